@@ -16,6 +16,7 @@ class BillCreate(BaseModel):
     items: List[BillItem]
     payment_method: str = Field(default="cash")  # cash, card, upi
     customer_name: Optional[str] = None
+    reprice: bool = False  # recompute line amounts from stored product prices
 
 class BillResponse(BaseModel):
     id: str
@@ -28,3 +29,22 @@ class BillResponse(BaseModel):
     payment_method: str
     customer_name: Optional[str] = None
     created_at: str
+
+class CartQuoteItem(BaseModel):
+    barcode: str
+    quantity: int = Field(..., gt=0)
+
+class CartQuoteRequest(BaseModel):
+    items: List[CartQuoteItem]
+
+class CartQuoteLine(BillItem):
+    available_stock: int
+    in_stock: bool
+
+class CartQuoteResponse(BaseModel):
+    items: List[CartQuoteLine]
+    missing_barcodes: List[str]
+    subtotal: float
+    gst_amount: float
+    total: float
+    can_checkout: bool
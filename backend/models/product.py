@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class ProductCreate(BaseModel):
@@ -35,3 +35,27 @@ class ProductResponse(BaseModel):
     gst_rate: float
     created_at: str
     updated_at: str
+
+class StockAdjustmentRow(BaseModel):
+    # Identify the product by product_id or barcode, and give delta or absolute
+    product_id: Optional[str] = None
+    barcode: Optional[str] = None
+    delta: Optional[int] = None
+    absolute: Optional[int] = Field(None, ge=0)
+
+class StockAdjustmentRequest(BaseModel):
+    rows: List[StockAdjustmentRow] = Field(..., min_length=1, max_length=1000)
+    reason: Optional[str] = None  # shipment, stock_take, damage
+
+class StockAdjustmentResult(BaseModel):
+    index: int
+    product_id: Optional[str] = None
+    barcode: Optional[str] = None
+    status: str  # applied, invalid, not_found, insufficient_stock, conflict
+    stock: Optional[int] = None
+    detail: Optional[str] = None
+
+class StockAdjustmentResponse(BaseModel):
+    applied: int
+    failed: int
+    results: List[StockAdjustmentResult]
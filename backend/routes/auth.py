@@ -4,11 +4,12 @@ from models.user import UserSignup, UserLogin, UserResponse
 from utils.password import hash_password, verify_password
 from utils.jwt_handler import create_access_token
 from utils.auth_middleware import get_current_user
+from utils.profiling import ProfiledRoute
 from datetime import datetime
 from bson import ObjectId
 from typing import Optional
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=ProfiledRoute)
 
 def get_db():
     from server import db
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, HTTPException, status, Query, Header
+from fastapi import APIRouter, HTTPException, status, Query, Header, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from models.bill import BillCreate, BillResponse, BillItem
+from models.bill import BillCreate, BillResponse, BillItem, CartQuoteRequest, CartQuoteResponse
 from utils.auth_middleware import get_current_user
+from utils.profiling import ProfiledRoute
+from utils.sales_logs import record_sales
+from utils.bill_archive import find_archived_bill, find_archived_bills
+from utils.responses import MsgPackResponse, encode_document, vary_on_accept, wants_msgpack
+from utils.dates import to_utc_naive
+from utils.pricing import cart_totals, price_line
+from utils.invalidation import invalidate_local_writes
 from datetime import datetime
 from bson import ObjectId
 from typing import List, Optional
 
-router = APIRouter(prefix="/bills", tags=["Bills"])
+router = APIRouter(prefix="/bills", tags=["Bills"], route_class=ProfiledRoute)
+
+BILL_FIELDS = tuple(BillResponse.model_fields)
 
 def get_db():
     from server import db
@@ -14,13 +23,14 @@ def get_db():
 
 async def generate_bill_number(db, user_id: str, store_code: str) -> str:
     """Generate bill number in format: STORECODE-YYYYMMDD-001"""
-    today = datetime.utcnow().strftime("%Y%m%d")
-    prefix = f"{store_code}-{today}"
+    now = datetime.utcnow()
+    prefix = f"{store_code}-{now.strftime('%Y%m%d')}"
     
-    # Count today's bills
+    # Count today's bills (a range on the (user_id, created_at) index)
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     count = await db.bills.count_documents({
         "user_id": user_id,
-        "bill_number": {"$regex": f"^{prefix}"}
+        "created_at": {"$gte": today_start}
     })
     
     sequence = str(count + 1).zfill(3)
@@ -40,19 +50,26 @@ async def create_bill(bill_data: BillCreate, authorization: Optional[str] = Head
             detail="Bill must contain at least one item"
         )
     
+    # Fetch all products for the bill in one query
+    try:
+        product_ids = [ObjectId(item.product_id) for item in bill_data.items]
+    except:
+        invalid = next(item.product_id for item in bill_data.items if not ObjectId.is_valid(item.product_id))
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid product ID: {invalid}"
+        )
+    # Products are keyed by canonical lowercase hex, whatever case the client sent
+    for item, product_id in zip(bill_data.items, product_ids):
+        item.product_id = str(product_id)
+    products = {
+        str(p["_id"]): p
+        async for p in db.products.find({"_id": {"$in": product_ids}, "user_id": user_id})
+    }
+    
     # Validate stock availability for all items
     for item in bill_data.items:
-        try:
-            product = await db.products.find_one({
-                "_id": ObjectId(item.product_id),
-                "user_id": user_id
-            })
-        except:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid product ID: {item.product_id}"
-            )
-        
+        product = products.get(item.product_id)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -67,9 +84,15 @@ async def create_bill(bill_data: BillCreate, authorization: Optional[str] = Head
             )
     
     # Calculate totals
-    subtotal = sum(item.item_total for item in bill_data.items)
-    total_gst = sum(item.gst_amount for item in bill_data.items)
-    grand_total = subtotal + total_gst
+    items = bill_data.items
+    if bill_data.reprice:
+        # Server-side pricing from the stored products, same as the cart quote
+        items = [BillItem(**price_line(products[item.product_id], item.quantity)) for item in items]
+        subtotal, total_gst, grand_total = cart_totals(item.dict() for item in items)
+    else:
+        subtotal = sum(item.item_total for item in items)
+        total_gst = sum(item.gst_amount for item in items)
+        grand_total = subtotal + total_gst
     
     # Generate bill number
     bill_number = await generate_bill_number(db, user_id, store_code)
@@ -78,7 +101,7 @@ async def create_bill(bill_data: BillCreate, authorization: Optional[str] = Head
     bill_dict = {
         "user_id": user_id,
         "bill_number": bill_number,
-        "items": [item.dict() for item in bill_data.items],
+        "items": [item.dict() for item in items],
         "subtotal": subtotal,
         "gst_amount": total_gst,
         "total": grand_total,
@@ -92,29 +115,21 @@ async def create_bill(bill_data: BillCreate, authorization: Optional[str] = Head
     bill_id = str(result.inserted_id)
     
     # Deduct stock for each item
-    for item in bill_data.items:
+    for item in items:
         await db.products.update_one(
             {"_id": ObjectId(item.product_id)},
             {"$inc": {"stock": -item.quantity}}
         )
-        
-        # Create sales log entry
-        await db.sales_logs.insert_one({
-            "user_id": user_id,
-            "product_id": item.product_id,
-            "product_name": item.product_name,
-            "quantity": item.quantity,
-            "price": item.price,
-            "total": item.item_total + item.gst_amount,
-            "bill_id": bill_id,
-            "date": datetime.utcnow()
-        })
+    invalidate_local_writes(user_id, [item.product_id for item in items])
+    
+    # Create sales log entries
+    await record_sales(db, user_id, bill_id, bill_dict["items"], bill_dict["created_at"])
     
     return BillResponse(
         id=bill_id,
         user_id=user_id,
         bill_number=bill_number,
-        items=bill_data.items,
+        items=items,
         subtotal=subtotal,
         gst_amount=total_gst,
         total=grand_total,
@@ -123,21 +138,86 @@ async def create_bill(bill_data: BillCreate, authorization: Optional[str] = Head
         created_at=bill_dict["created_at"].isoformat()
     )
 
+@router.post("/quote", response_model=CartQuoteResponse)
+async def quote_cart(cart: CartQuoteRequest, authorization: Optional[str] = Header(None)):
+    """Price a cart of scanned barcodes in one round trip"""
+    db = get_db()
+    user = await get_current_user(authorization=authorization, db=db)
+    user_id = str(user["_id"])
+    
+    # Merge repeated scans of the same barcode, keeping scan order
+    quantities = {}
+    for item in cart.items:
+        quantities[item.barcode] = quantities.get(item.barcode, 0) + item.quantity
+    
+    products = {
+        p["barcode"]: p
+        async for p in db.products.find({"user_id": user_id, "barcode": {"$in": list(quantities)}})
+    }
+    
+    lines = []
+    missing_barcodes = []
+    for barcode, quantity in quantities.items():
+        product = products.get(barcode)
+        if not product:
+            missing_barcodes.append(barcode)
+            continue
+        line = price_line(product, quantity)
+        line["available_stock"] = product["stock"]
+        line["in_stock"] = product["stock"] >= quantity
+        lines.append(line)
+    
+    subtotal, total_gst, grand_total = cart_totals(lines)
+    
+    return CartQuoteResponse(
+        items=lines,
+        missing_barcodes=missing_barcodes,
+        subtotal=subtotal,
+        gst_amount=total_gst,
+        total=grand_total,
+        can_checkout=bool(lines) and not missing_barcodes and all(line["in_stock"] for line in lines)
+    )
+
 @router.get("/", response_model=List[BillResponse])
 async def get_bills(
+    response: Response,
     authorization: Optional[str] = Header(None),
     skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=500)
+    limit: int = Query(50, ge=1, le=500),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    accept: Optional[str] = Header(None)
 ):
     """Get all bills for authenticated user"""
     db = get_db()
     user = await get_current_user(authorization=authorization, db=db)
     user_id = str(user["_id"])
+    start_date = to_utc_naive(start_date)
+    end_date = to_utc_naive(end_date)
+    
+    query = {"user_id": user_id}
+    if start_date or end_date:
+        query["created_at"] = {}
+        if start_date:
+            query["created_at"]["$gte"] = start_date
+        if end_date:
+            query["created_at"]["$lt"] = end_date
+    
+    bills = await db.bills.find(query).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
+    
+    # Continue into the archive once the hot tier runs out
+    if len(bills) < limit:
+        archive_skip = 0
+        if not bills and skip:
+            archive_skip = skip - await db.bills.count_documents(query)
+        bills += await find_archived_bills(
+            db, user_id, archive_skip, limit - len(bills), start_date, end_date
+        )
     
-    bills = await db.bills.find(
-        {"user_id": user_id}
-    ).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
+    if wants_msgpack(accept):
+        return MsgPackResponse([encode_document(b, BILL_FIELDS) for b in bills])
     
+    vary_on_accept(response)
     return [
         BillResponse(
             id=str(b["_id"]),
@@ -155,7 +235,12 @@ async def get_bills(
     ]
 
 @router.get("/{bill_id}", response_model=BillResponse)
-async def get_bill(bill_id: str, authorization: Optional[str] = Header(None)):
+async def get_bill(
+    bill_id: str,
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None)
+):
     """Get single bill by ID"""
     db = get_db()
     user = await get_current_user(authorization=authorization, db=db)
@@ -172,12 +257,20 @@ async def get_bill(bill_id: str, authorization: Optional[str] = Header(None)):
             detail="Invalid bill ID"
         )
     
+    # Fall back to the archive for old bills
+    if not bill:
+        bill = await find_archived_bill(db, user_id, ObjectId(bill_id))
+    
     if not bill:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Bill not found"
         )
     
+    if wants_msgpack(accept):
+        return MsgPackResponse(encode_document(bill, BILL_FIELDS))
+    
+    vary_on_accept(response)
     return BillResponse(
         id=str(bill["_id"]),
         user_id=bill["user_id"],
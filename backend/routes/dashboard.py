@@ -1,18 +1,25 @@
-from fastapi import APIRouter, HTTPException, status, Header
+from fastapi import APIRouter, HTTPException, status, Header, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from utils.auth_middleware import get_current_user
+from utils.profiling import ProfiledRoute
+from utils.cache import dashboard_cache
+from utils.responses import negotiate
 from datetime import datetime, timedelta
 from bson import ObjectId
 from typing import List, Dict, Optional
 
-router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"], route_class=ProfiledRoute)
 
 def get_db():
     from server import db
     return db
 
 @router.get("/stats")
-async def get_dashboard_stats(authorization: Optional[str] = Header(None)):
+async def get_dashboard_stats(
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None)
+):
     """Get dashboard statistics"""
     db = get_db()
     user = await get_current_user(authorization=authorization, db=db)
@@ -22,6 +29,11 @@ async def get_dashboard_stats(authorization: Optional[str] = Header(None)):
     today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     today_end = today_start + timedelta(days=1)
     
+    stats = dashboard_cache.get((user_id, today_start))
+    if stats:
+        return negotiate(stats, accept, response)
+    generation = dashboard_cache.generation(user_id)
+    
     # Today's sales
     today_bills = await db.bills.find({
         "user_id": user_id,
@@ -44,16 +56,23 @@ async def get_dashboard_stats(authorization: Optional[str] = Header(None)):
     products = await db.products.find({"user_id": user_id}).to_list(10000)
     total_inventory_value = sum(p["price"] * p["stock"] for p in products)
     
-    return {
+    stats = {
         "today_sales": round(today_sales, 2),
         "today_transactions": today_transactions,
         "total_products": total_products,
         "low_stock_count": low_stock_products,
         "total_inventory_value": round(total_inventory_value, 2)
     }
+    dashboard_cache.set((user_id, today_start), stats, owner=user_id, generation=generation)
+    return negotiate(stats, accept, response)
 
 @router.get("/recent-bills")
-async def get_recent_bills(authorization: Optional[str] = Header(None), limit: int = 5):
+async def get_recent_bills(
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    limit: int = 5
+):
     """Get recent bills for dashboard"""
     db = get_db()
     user = await get_current_user(authorization=authorization, db=db)
@@ -63,13 +82,13 @@ async def get_recent_bills(authorization: Optional[str] = Header(None), limit: i
         {"user_id": user_id}
     ).sort("created_at", -1).limit(limit).to_list(limit)
     
-    return [
+    return negotiate([
         {
             "id": str(b["_id"]),
             "bill_number": b["bill_number"],
             "total": b["total"],
             "items_count": len(b["items"]),
-            "created_at": b["created_at"].isoformat()
+            "created_at": b["created_at"]
         }
         for b in bills
-    ]
+    ], accept, response)
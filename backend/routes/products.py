@@ -1,12 +1,25 @@
-from fastapi import APIRouter, HTTPException, status, Query, Header
+from fastapi import APIRouter, HTTPException, status, Query, Header, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from models.product import ProductCreate, ProductUpdate, ProductResponse
+from models.product import (
+    ProductCreate, ProductUpdate, ProductResponse,
+    StockAdjustmentRequest, StockAdjustmentResponse, StockAdjustmentResult
+)
 from utils.auth_middleware import get_current_user
+from utils.profiling import ProfiledRoute
+from utils.cache import products_cache
+from utils.invalidation import invalidate_local_writes
+from utils.responses import MsgPackResponse, encode_document, vary_on_accept, wants_msgpack
 from datetime import datetime
 from bson import ObjectId
+from pymongo import UpdateOne
 from typing import List, Optional
 
-router = APIRouter(prefix="/products", tags=["Products"])
+router = APIRouter(prefix="/products", tags=["Products"], route_class=ProfiledRoute)
+
+PRODUCT_FIELDS = tuple(ProductResponse.model_fields)
+
+# Adjustment ids kept on each product to tell whether a bulk adjustment's write landed
+RECENT_ADJUSTMENTS_KEPT = 20
 
 def get_db():
     from server import db
@@ -40,6 +53,7 @@ async def create_product(product_data: ProductCreate, authorization: Optional[st
     
     result = await db.products.insert_one(product_dict)
     product_dict["_id"] = result.inserted_id
+    invalidate_local_writes(user_id)
     
     return ProductResponse(
         id=str(product_dict["_id"]),
@@ -56,9 +70,141 @@ async def create_product(product_data: ProductCreate, authorization: Optional[st
         updated_at=product_dict["updated_at"].isoformat()
     )
 
+@router.post("/stock-adjustments", response_model=StockAdjustmentResponse)
+async def adjust_stock(adjustment: StockAdjustmentRequest, authorization: Optional[str] = Header(None)):
+    """Apply many stock adjustments (shipments, stock takes) in one bulk write"""
+    db = get_db()
+    user = await get_current_user(authorization=authorization, db=db)
+    user_id = str(user["_id"])
+    
+    results = [
+        StockAdjustmentResult(index=i, product_id=row.product_id, barcode=row.barcode, status="pending")
+        for i, row in enumerate(adjustment.rows)
+    ]
+    
+    # Validate rows: one identifier and exactly one of delta/absolute
+    for row, result in zip(adjustment.rows, results):
+        if (row.product_id is None) == (row.barcode is None):
+            result.status, result.detail = "invalid", "Provide exactly one of product_id or barcode"
+        elif (row.delta is None) == (row.absolute is None):
+            result.status, result.detail = "invalid", "Provide exactly one of delta or absolute"
+        elif row.product_id is not None and not ObjectId.is_valid(row.product_id):
+            result.status, result.detail = "invalid", "Invalid product ID"
+        elif row.product_id is not None:
+            # Products are keyed by canonical lowercase hex, whatever case the client sent
+            row.product_id = str(ObjectId(row.product_id))
+    
+    # Resolve every referenced product in one query
+    valid_rows = [(row, result) for row, result in zip(adjustment.rows, results) if result.status == "pending"]
+    product_ids = [ObjectId(row.product_id) for row, _ in valid_rows if row.product_id]
+    barcodes = [row.barcode for row, _ in valid_rows if row.barcode]
+    by_id = {}
+    by_barcode = {}
+    if valid_rows:
+        async for p in db.products.find(
+            {"user_id": user_id, "$or": [{"_id": {"$in": product_ids}}, {"barcode": {"$in": barcodes}}]},
+            {"stock": 1, "barcode": 1}
+        ):
+            by_id[str(p["_id"])] = p
+            by_barcode[p["barcode"]] = p
+    
+    # Validate rows against projected stock so repeated rows for a product stack,
+    # then collapse each product's rows into a single operation: unordered bulk
+    # writes may be reordered, so per-row operations could not be stacked safely
+    now = datetime.utcnow()
+    adjustment_id = ObjectId()
+    plans = {}
+    for row, result in valid_rows:
+        product = by_id.get(row.product_id) if row.product_id else by_barcode.get(row.barcode)
+        if not product:
+            result.status, result.detail = "not_found", "Product not found"
+            continue
+        
+        product_id = str(product["_id"])
+        plan = plans.setdefault(product_id, {
+            "product": product, "stock": product["stock"], "absolute": None, "delta": 0, "rows": []
+        })
+        before = plan["stock"]
+        after = row.absolute if row.absolute is not None else before + row.delta
+        if after < 0:
+            result.status = "insufficient_stock"
+            result.detail = f"Available: {before}, Requested change: {row.delta}"
+            continue
+        
+        if row.absolute is not None:
+            plan["absolute"], plan["delta"] = row.absolute, 0
+        else:
+            plan["delta"] += row.delta
+        plan["stock"] = after
+        result.product_id, result.barcode = product_id, product["barcode"]
+        plan["rows"].append((row, result, before, after))
+    plans = {product_id: plan for product_id, plan in plans.items() if plan["rows"]}
+    
+    # Each write records the adjustment id; a recent-id list survives concurrent adjustments
+    marker = {"$push": {"recent_adjustments": {"$each": [adjustment_id], "$slice": -RECENT_ADJUSTMENTS_KEPT}}}
+    operations = []
+    for plan in plans.values():
+        query = {"_id": plan["product"]["_id"], "user_id": user_id}
+        if plan["absolute"] is not None:
+            update = {"$set": {"stock": plan["absolute"] + plan["delta"], "updated_at": now}, **marker}
+        else:
+            # Guard net removals against bills that landed since the read above
+            if plan["delta"] < 0:
+                query["stock"] = {"$gte": -plan["delta"]}
+            update = {"$inc": {"stock": plan["delta"]}, "$set": {"updated_at": now}, **marker}
+        operations.append(UpdateOne(query, update))
+    
+    if operations:
+        await db.products.bulk_write(operations, ordered=False)
+        invalidate_local_writes(user_id, plans)
+        
+        # Re-read final stock and whether this adjustment's write landed, in one query
+        final = {
+            str(p["_id"]): p
+            async for p in db.products.find(
+                {"_id": {"$in": [plan["product"]["_id"] for plan in plans.values()]}},
+                {"stock": 1, "recent_adjustments": 1}
+            )
+        }
+        
+        log_rows = []
+        for product_id, plan in plans.items():
+            current = final.get(product_id, {})
+            applied = adjustment_id in current.get("recent_adjustments", [])
+            for row, result, before, after in plan["rows"]:
+                result.stock = current.get("stock")
+                log_row = {
+                    "product_id": product_id,
+                    "barcode": plan["product"]["barcode"],
+                    "delta": row.delta,
+                    "absolute": row.absolute
+                }
+                if applied:
+                    result.status = "applied"
+                    log_row.update(before=before, after=after)
+                else:
+                    # The guarded removal lost a race with a concurrent sale; nothing was written
+                    result.status = "conflict"
+                    result.detail = "Stock changed during adjustment; retry this row"
+                    log_row["conflict"] = True
+                log_rows.append(log_row)
+        
+        await db.stock_adjustments.insert_one({
+            "_id": adjustment_id,
+            "user_id": user_id,
+            "reason": adjustment.reason,
+            "rows": log_rows,
+            "created_at": now
+        })
+    
+    applied = sum(1 for result in results if result.status == "applied")
+    return StockAdjustmentResponse(applied=applied, failed=len(results) - applied, results=results)
+
 @router.get("/", response_model=List[ProductResponse])
 async def get_products(
+    response: Response,
     authorization: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = None
@@ -76,6 +222,10 @@ async def get_products(
     # Fetch products
     products = await db.products.find(query).skip(skip).limit(limit).to_list(limit)
     
+    if wants_msgpack(accept):
+        return MsgPackResponse([encode_document(p, PRODUCT_FIELDS) for p in products])
+    
+    vary_on_accept(response)
     return [
         ProductResponse(
             id=str(p["_id"]),
@@ -95,23 +245,37 @@ async def get_products(
     ]
 
 @router.get("/barcode/{barcode}", response_model=ProductResponse)
-async def get_product_by_barcode(barcode: str, authorization: Optional[str] = Header(None)):
+async def get_product_by_barcode(
+    barcode: str,
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None)
+):
     """Get product by barcode"""
     db = get_db()
     user = await get_current_user(authorization=authorization, db=db)
     user_id = str(user["_id"])
     
-    product = await db.products.find_one({
-        "user_id": user_id,
-        "barcode": barcode
-    })
-    
+    product = products_cache.get((user_id, barcode))
     if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
+        # The product id is unknown until the read, so use the cache-wide generation
+        generation = products_cache.generation()
+        product = await db.products.find_one({
+            "user_id": user_id,
+            "barcode": barcode
+        })
+        
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        products_cache.set((user_id, barcode), product, owner=str(product["_id"]), generation=generation)
+    
+    if wants_msgpack(accept):
+        return MsgPackResponse(encode_document(product, PRODUCT_FIELDS))
     
+    vary_on_accept(response)
     return ProductResponse(
         id=str(product["_id"]),
         user_id=product["user_id"],
@@ -128,7 +292,11 @@ async def get_product_by_barcode(barcode: str, authorization: Optional[str] = He
     )
 
 @router.get("/low-stock", response_model=List[ProductResponse])
-async def get_low_stock_products(authorization: Optional[str] = Header(None)):
+async def get_low_stock_products(
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None)
+):
     """Get products with low stock"""
     db = get_db()
     user = await get_current_user(authorization=authorization, db=db)
@@ -140,6 +308,10 @@ async def get_low_stock_products(authorization: Optional[str] = Header(None)):
         "$expr": {"$lte": ["$stock", "$min_stock_alert"]}
     }).to_list(1000)
     
+    if wants_msgpack(accept):
+        return MsgPackResponse([encode_document(p, PRODUCT_FIELDS) for p in products])
+    
+    vary_on_accept(response)
     return [
         ProductResponse(
             id=str(p["_id"]),
@@ -159,7 +331,12 @@ async def get_low_stock_products(authorization: Optional[str] = Header(None)):
     ]
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: str, authorization: Optional[str] = Header(None)):
+async def get_product(
+    product_id: str,
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None)
+):
     """Get single product by ID"""
     db = get_db()
     user = await get_current_user(authorization=authorization, db=db)
@@ -182,6 +359,10 @@ async def get_product(product_id: str, authorization: Optional[str] = Header(Non
             detail="Product not found"
         )
     
+    if wants_msgpack(accept):
+        return MsgPackResponse(encode_document(product, PRODUCT_FIELDS))
+    
+    vary_on_accept(response)
     return ProductResponse(
         id=str(product["_id"]),
         user_id=product["user_id"],
@@ -236,6 +417,7 @@ async def update_product(
             {"_id": obj_id},
             {"$set": update_data}
         )
+        invalidate_local_writes(user_id, [str(obj_id)])
     
     # Fetch updated product
     updated_product = await db.products.find_one({"_id": obj_id})
@@ -280,5 +462,6 @@ async def delete_product(product_id: str, authorization: Optional[str] = Header(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
+    invalidate_local_writes(user_id, [str(obj_id)])
     
     return {"message": "Product deleted successfully"}
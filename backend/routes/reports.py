@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException, status, Query, Header, Response
+from utils.auth_middleware import get_current_user
+from utils.profiling import ProfiledRoute
+from utils.gst import GST_REPORT_MAX_DAYS, gst_report, month_start
+from utils.responses import negotiate
+from utils.dates import to_utc_naive
+from datetime import datetime, timedelta
+from typing import Optional
+
+router = APIRouter(prefix="/reports", tags=["Reports"], route_class=ProfiledRoute)
+
+def get_db():
+    from server import db
+    return db
+
+@router.get("/gst")
+async def get_gst_report(
+    response: Response,
+    authorization: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None)
+):
+    """Get taxable value and tax per GST slab for a period (defaults to this month)"""
+    db = get_db()
+    user = await get_current_user(authorization=authorization, db=db)
+    user_id = str(user["_id"])
+    
+    now = datetime.utcnow()
+    start_date = to_utc_naive(start_date) or month_start(now)
+    end_date = to_utc_naive(end_date) or now
+    
+    if start_date >= end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must be before end_date"
+        )
+    
+    # No bills exist outside the store's lifetime, so never walk months before it or after now
+    created_at = user.get("created_at")
+    if created_at:
+        start_date = max(start_date, min(created_at, end_date))
+    end_date = min(end_date, max(now, start_date))
+    
+    if end_date - start_date > timedelta(days=GST_REPORT_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Report period cannot exceed {GST_REPORT_MAX_DAYS} days"
+        )
+    
+    report = await gst_report(db, user_id, start_date, end_date, now=now)
+    return negotiate(report, accept, response)
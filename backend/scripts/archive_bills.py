@@ -0,0 +1,45 @@
+"""Move old bills from the bills collection into the compressed bill_archive tier.
+
+Usage (from the backend directory):
+    python -m scripts.archive_bills [--older-than-days N]
+
+Intended to run from cron, outside the API workers. The cutoff is aligned to a
+day boundary, so every store/day bucket is written in a single run; re-running
+after an interruption merges into the existing buckets.
+"""
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pathlib import Path
+import argparse
+import asyncio
+import os
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+
+from utils.bill_archive import BILL_ARCHIVE_AFTER_DAYS, archive_bills, archive_cutoff, ensure_bill_archive_indexes
+from utils.gst import materialize_closed_months
+
+async def main(older_than_days: int):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'kirana_shop_db')]
+    try:
+        await ensure_bill_archive_indexes(db)
+
+        # Summarize closed months while their bills can still be aggregated server-side
+        months = await materialize_closed_months(db, archive_cutoff(older_than_days))
+        print(f"Materialized {months} GST monthly summaries")
+
+        result = await archive_bills(db, older_than_days)
+        print(
+            f"Archived {result['archived']} bills created before "
+            f"{result['cutoff'].date().isoformat()} into {result['buckets']} buckets"
+        )
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--older-than-days", type=int, default=BILL_ARCHIVE_AFTER_DAYS)
+    args = parser.parse_args()
+    asyncio.run(main(args.older_than_days))
@@ -0,0 +1,244 @@
+"""Time the main product, bill and dashboard handlers at several data sizes.
+
+Usage (from the backend directory):
+    python -m scripts.bench_handlers [--sizes 3x200x2000,3x1000x20000] [--rounds 20] [--label "note"]
+
+Each size is STORESxPRODUCTSxBILLS (per store). For every size the benchmark
+database (BENCH_DB_NAME, never DB_NAME) is dropped, migrated and loaded with
+the synthetic dataset from scripts.synthetic_data, then each handler is called
+directly as the middle store with caches disabled. One JSON line per run is
+appended to the results file (--results) and the medians are compared with
+the previous run in that file.
+"""
+from dotenv import load_dotenv
+from fastapi import Response
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+
+# The app reads DB_NAME at import time, so point it at the benchmark database first
+BENCH_DB_NAME = os.getenv("BENCH_DB_NAME", "kirana_shop_bench")
+os.environ["DB_NAME"] = BENCH_DB_NAME
+
+from models.bill import BillCreate, CartQuoteRequest
+from models.product import ProductUpdate, StockAdjustmentRequest
+from routes import bills, dashboard, products
+from scripts.synthetic_data import generate_stores, load_store
+from utils.cache import set_caches_active
+from utils.jwt_handler import create_access_token
+from utils.password import hash_password
+from utils.sales_logs import SALES_LOG_MODE
+from utils.schema import run_migrations
+
+DEFAULT_SIZES = "3x200x2000,3x1000x20000"
+DEFAULT_RESULTS = ROOT_DIR / "benchmarks" / "handler_results.jsonl"
+WARMUP_ROUNDS = 2
+
+def parse_sizes(value: str) -> list:
+    sizes = []
+    for size in value.split(","):
+        stores, product_count, bill_count = (int(part) for part in size.strip().lower().split("x"))
+        sizes.append((stores, product_count, bill_count))
+    return sizes
+
+def handler_calls(store: dict, rounds: int) -> dict:
+    """Handler name -> zero-argument coroutine factory, called as the given store"""
+    auth = store["authorization"]
+    catalog = store["products"]
+    history = store["bills"]
+    # Billing deducts stock, so only use products that survive every round
+    stocked = [p for p in catalog if p["stock"] >= rounds + WARMUP_ROUNDS][:4]
+    range_end = history[-1]["created_at"] - timedelta(days=14)
+
+    bill = BillCreate(
+        items=[
+            {
+                "product_id": str(p["_id"]), "product_name": p["name"], "barcode": p["barcode"],
+                "quantity": 1, "price": p["price"], "gst_rate": p["gst_rate"], "item_total": 0, "gst_amount": 0
+            }
+            for p in stocked
+        ],
+        reprice=True
+    )
+    quote = CartQuoteRequest(items=[{"barcode": p["barcode"], "quantity": 2} for p in catalog[:10]])
+    adjustment = StockAdjustmentRequest(
+        rows=[{"barcode": p["barcode"], "delta": 1} for p in catalog[:50]],
+        reason="shipment"
+    )
+
+    return {
+        "products.list": lambda: products.get_products(
+            authorization=auth, response=Response(), accept=None, skip=0, limit=100, search=None
+        ),
+        "products.list_msgpack": lambda: products.get_products(
+            authorization=auth, response=Response(), accept="application/msgpack", skip=0, limit=100, search=None
+        ),
+        "products.search": lambda: products.get_products(
+            authorization=auth, response=Response(), accept=None, skip=0, limit=100, search="dal"
+        ),
+        "products.barcode": lambda: products.get_product_by_barcode(
+            catalog[-1]["barcode"], authorization=auth, response=Response(), accept=None
+        ),
+        "products.get": lambda: products.get_product(
+            str(catalog[0]["_id"]), authorization=auth, response=Response(), accept=None
+        ),
+        "products.low_stock": lambda: products.get_low_stock_products(
+            authorization=auth, response=Response(), accept=None
+        ),
+        "products.update": lambda: products.update_product(
+            str(catalog[1]["_id"]), ProductUpdate(price=catalog[1]["price"]), authorization=auth
+        ),
+        "products.stock_adjustments": lambda: products.adjust_stock(adjustment, authorization=auth),
+        "bills.create": lambda: bills.create_bill(bill, authorization=auth),
+        "bills.quote": lambda: bills.quote_cart(quote, authorization=auth),
+        "bills.list": lambda: bills.get_bills(
+            authorization=auth, skip=0, limit=50, start_date=None, end_date=None, response=Response(), accept=None
+        ),
+        "bills.list_deep_page": lambda: bills.get_bills(
+            authorization=auth, skip=1000, limit=50, start_date=None, end_date=None, response=Response(), accept=None
+        ),
+        "bills.list_range": lambda: bills.get_bills(
+            authorization=auth, skip=0, limit=50,
+            start_date=range_end - timedelta(days=7), end_date=range_end, response=Response(), accept=None
+        ),
+        "bills.get": lambda: bills.get_bill(
+            str(history[len(history) // 2]["_id"]), authorization=auth, response=Response(), accept=None
+        ),
+        "dashboard.stats": lambda: dashboard.get_dashboard_stats(authorization=auth, response=Response(), accept=None),
+        "dashboard.recent_bills": lambda: dashboard.get_recent_bills(
+            authorization=auth, response=Response(), accept=None, limit=5
+        )
+    }
+
+async def time_handler(call, rounds: int) -> dict:
+    for _ in range(WARMUP_ROUNDS):
+        await call()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3)
+    }
+
+async def bench_size(client, db, stores: int, product_count: int, bill_count: int, rounds: int, seed: int) -> dict:
+    await client.drop_database(db.name)
+    await run_migrations(db)
+
+    # Equal-sized stores, so every size row describes exactly what was measured
+    generated = []
+    load_started = time.perf_counter()
+    for store in generate_stores(
+        stores, product_count, bill_count, seed=seed, spread=0, password_hash=hash_password("password")
+    ):
+        await load_store(db, store)
+        generated.append(store)
+    load_seconds = time.perf_counter() - load_started
+
+    target = generated[len(generated) // 2]
+    target["authorization"] = "Bearer " + create_access_token({"user_id": str(target["user"]["_id"])})
+
+    handlers = {}
+    for name, call in handler_calls(target, rounds).items():
+        handlers[name] = await time_handler(call, rounds)
+        print(f"  {name:<28}{handlers[name]['median_ms']:>10.2f} ms")
+
+    return {
+        "stores": stores,
+        "products": product_count,
+        "bills": bill_count,
+        "sales_logs": len(target["sales_logs"]),
+        "load_seconds": round(load_seconds, 2),
+        "handlers": handlers
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def previous_run(results_path: Path):
+    if not results_path.exists():
+        return None
+    lines = [line for line in results_path.read_text().splitlines() if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+def print_comparison(run: dict, previous):
+    """Print medians with the change against the previous run for the same size"""
+    baseline = {}
+    if previous:
+        for size in previous["sizes"]:
+            for name, timing in size["handlers"].items():
+                baseline[(size["stores"], size["products"], size["bills"], name)] = timing["median_ms"]
+        print(f"\nCompared with {previous['timestamp']} ({previous.get('commit') or 'unknown commit'})")
+
+    for size in run["sizes"]:
+        print(f"\n{size['stores']} stores x {size['products']} products x {size['bills']} bills")
+        print(f"{'handler':<28}{'median ms':>12}{'p95 ms':>10}{'previous':>12}{'change':>10}")
+        for name, timing in size["handlers"].items():
+            before = baseline.get((size["stores"], size["products"], size["bills"], name))
+            change = f"{(timing['median_ms'] - before) / before * 100:+.1f}%" if before else ""
+            before_text = f"{before:.2f}" if before else ""
+            print(f"{name:<28}{timing['median_ms']:>12.2f}{timing['p95_ms']:>10.2f}{before_text:>12}{change:>10}")
+
+async def main(args):
+    import server
+
+    set_caches_active(False)
+    sizes = parse_sizes(args.sizes)
+    run = {
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "label": args.label,
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "sales_log_mode": SALES_LOG_MODE,
+        "rounds": args.rounds,
+        "seed": args.seed,
+        "sizes": []
+    }
+    try:
+        for stores, product_count, bill_count in sizes:
+            print(f"Benchmarking {stores}x{product_count}x{bill_count} in {server.db.name}")
+            run["sizes"].append(
+                await bench_size(server.client, server.db, stores, product_count, bill_count, args.rounds, args.seed)
+            )
+        if not args.keep:
+            await server.client.drop_database(server.db.name)
+    finally:
+        server.client.close()
+
+    results_path = Path(args.results)
+    print_comparison(run, previous_run(results_path))
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    with results_path.open("a") as f:
+        f.write(json.dumps(run) + "\n")
+    print(f"\nResults appended to {results_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated STORESxPRODUCTSxBILLS")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default="", help="free-form note stored with the run")
+    parser.add_argument("--results", default=str(DEFAULT_RESULTS))
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark database after the run")
+    args = parser.parse_args()
+    asyncio.run(main(args))
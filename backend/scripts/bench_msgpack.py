@@ -0,0 +1,95 @@
+"""Compare JSON and MessagePack encoding of a product list response.
+
+Usage (from the backend directory):
+    python -m scripts.bench_msgpack [--products 1000] [--rounds 50]
+
+The JSON path mirrors get_products: build ProductResponse models, then let
+FastAPI's encoder and JSONResponse render them. The MessagePack path encodes
+the raw Mongo documents directly. No database is needed.
+"""
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import argparse
+import json
+import random
+import time
+
+from models.product import ProductResponse
+from routes.products import PRODUCT_FIELDS
+from utils.responses import MsgPackResponse, encode_document, msgpack
+
+def make_products(count: int) -> list:
+    rng = random.Random(42)
+    user_id = str(ObjectId())
+    created = datetime(2025, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "name": f"Product {i} {rng.choice(['Atta', 'Rice', 'Dal', 'Soap', 'Oil', 'Tea'])}",
+            "barcode": f"890{rng.randrange(10**9, 10**10)}",
+            "price": round(rng.uniform(5, 900), 2),
+            "stock": rng.randrange(0, 500),
+            "min_stock_alert": 10,
+            "category": rng.choice(["Grocery", "Personal Care", "Beverages", None]),
+            "image_base64": None,
+            "gst_rate": rng.choice([0.0, 5.0, 12.0, 18.0, 28.0]),
+            "created_at": created + timedelta(minutes=i),
+            "updated_at": created + timedelta(days=1, minutes=i)
+        }
+        for i in range(count)
+    ]
+
+def encode_json(products: list) -> bytes:
+    models = [
+        ProductResponse(
+            id=str(p["_id"]),
+            user_id=p["user_id"],
+            name=p["name"],
+            barcode=p["barcode"],
+            price=p["price"],
+            stock=p["stock"],
+            min_stock_alert=p["min_stock_alert"],
+            category=p.get("category"),
+            image_base64=p.get("image_base64"),
+            gst_rate=p["gst_rate"],
+            created_at=p["created_at"].isoformat(),
+            updated_at=p["updated_at"].isoformat()
+        )
+        for p in products
+    ]
+    return JSONResponse(jsonable_encoder(models)).body
+
+def encode_msgpack(products: list) -> bytes:
+    return MsgPackResponse([encode_document(p, PRODUCT_FIELDS) for p in products]).body
+
+def best_of(func, arg, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+def main(count: int, rounds: int):
+    products = make_products(count)
+    json_body = encode_json(products)
+    msgpack_body = encode_msgpack(products)
+
+    rows = [
+        ("json", len(json_body), best_of(encode_json, products, rounds), best_of(json.loads, json_body, rounds)),
+        ("msgpack", len(msgpack_body), best_of(encode_msgpack, products, rounds), best_of(msgpack.unpackb, msgpack_body, rounds))
+    ]
+    print(f"{count} products, best of {rounds} rounds")
+    print(f"{'format':<10}{'bytes':>10}{'encode ms':>12}{'decode ms':>12}")
+    for name, size, encode_ms, decode_ms in rows:
+        print(f"{name:<10}{size:>10}{encode_ms:>12.2f}{decode_ms:>12.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    main(args.products, args.rounds)
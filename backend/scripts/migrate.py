@@ -0,0 +1,35 @@
+"""Apply pending schema and index migrations.
+
+Usage (from the backend directory):
+    python -m scripts.migrate
+
+Run once per deploy, before starting the API workers. Workers only verify the
+schema version and required indexes at startup and refuse to start if this
+step has not been run.
+"""
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pathlib import Path
+import asyncio
+import os
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+
+from utils.schema import SCHEMA_VERSION, run_migrations, verify_schema
+
+async def main():
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'kirana_shop_db')]
+    try:
+        applied = await run_migrations(db)
+        await verify_schema(db)
+        if applied:
+            print(f"Applied migrations {applied}; schema is at version {SCHEMA_VERSION}")
+        else:
+            print(f"Schema already at version {SCHEMA_VERSION}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,226 @@
+"""Migrate sales_logs from one document per line to hourly bucket documents.
+
+Usage (from the backend directory):
+    python -m scripts.migrate_sales_logs [--lag-seconds 300]
+    python -m scripts.migrate_sales_logs --drop-source
+
+The API keeps inserting into sales_logs until every worker runs with
+SALES_LOG_MODE=bucketed, so the migration runs in two passes:
+
+1. While the API is still writing documents, copy every bill whose first
+   line is dated before now minus --lag-seconds. Re-running copies only
+   bills started since the last cutoff, which is stored in schema_migrations.
+2. Switch all workers to SALES_LOG_MODE=bucketed. Once no worker writes
+   documents any more, run with --drop-source. It copies the remaining tail,
+   checks with count_documents that every line in sales_logs was migrated,
+   and only then drops the collection.
+
+Each pass prints the storage, index size and write amplification of both
+layouts.
+"""
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+import argparse
+import asyncio
+import os
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+
+from utils.sales_logs import BUCKET_MAX_BILLS, bucket_hour, collection_storage
+
+INSERT_BATCH_SIZE = 500
+DEFAULT_LAG_SECONDS = 300
+# Legacy lines of one bill are inserted within this many seconds of each other
+MAX_BILL_SPAN_SECONDS = int(os.getenv("SALES_LOG_MAX_BILL_SPAN_SECONDS", "60"))
+# Progress document in schema_migrations: cutoff reached and lines copied so far
+STATE_ID = "sales_log_buckets"
+
+def new_bucket(user_id: str, hour) -> dict:
+    return {"user_id": user_id, "hour": hour, "bill_count": 0, "line_count": 0, "entries": []}
+
+async def migrate(db, start: Optional[datetime], end: Optional[datetime]) -> dict:
+    """Copy the bills first sold in [start, end) into sales_log_buckets, returning line and bucket counts
+
+    Legacy lines carry their own insert time, so one bill's lines may differ
+    by a moment, straddle an hour or the cutoff, and interleave with another
+    till's bill. Lines are grouped by bill_id within each store, and a bill
+    lands whole in one pass, keyed by its earliest line for both the entry
+    date and the hour bucket. A later pass may open a second bucket for the
+    same store and hour, which readers already handle for full buckets.
+    """
+    await db.sales_log_buckets.create_index([("user_id", 1), ("hour", -1)])
+
+    span = timedelta(seconds=MAX_BILL_SPAN_SECONDS)
+    # Read a margin past both ends so a bill's first and last lines are always seen
+    query = {}
+    if start or end:
+        query["date"] = {}
+        if start:
+            query["date"]["$gte"] = start - span
+        if end:
+            query["date"]["$lt"] = end + span
+
+    buckets = []
+    bucket = None
+    # bill_id -> (first line date, entry, bucket); entry is None for bills another pass owns
+    open_bills = {}
+    lines = 0
+    written = 0
+
+    # Reverse walk of the (user_id 1, date -1) index: stores in any order, dates ascending
+    cursor = db.sales_logs.find(query).sort([("user_id", -1), ("date", 1)])
+    async for log in cursor:
+        if bucket is not None and bucket["user_id"] != log["user_id"]:
+            open_bills = {}
+
+        bill = open_bills.get(log["bill_id"])
+        if bill is None:
+            first_date = log["date"]
+            if (start and first_date < start) or (end and first_date >= end):
+                open_bills[log["bill_id"]] = (first_date, None, None)
+                continue
+
+            hour = bucket_hour(first_date)
+            if (
+                bucket is None
+                or bucket["user_id"] != log["user_id"]
+                or bucket["hour"] != hour
+                or bucket["bill_count"] >= BUCKET_MAX_BILLS
+            ):
+                bucket = new_bucket(log["user_id"], hour)
+                buckets.append(bucket)
+
+            entry = {"bill_id": log["bill_id"], "date": first_date, "lines": []}
+            bucket["entries"].append(entry)
+            bucket["bill_count"] += 1
+            bill = open_bills[log["bill_id"]] = (first_date, entry, bucket)
+
+        _, entry, entry_bucket = bill
+        if entry is None:
+            continue
+        lines += 1
+        entry["lines"].append({
+            "product_id": log["product_id"],
+            "product_name": log["product_name"],
+            "quantity": log["quantity"],
+            "price": log["price"],
+            "total": log["total"]
+        })
+        entry_bucket["line_count"] += 1
+
+        # Flush buckets no open bill can still add lines to
+        if len(buckets) > INSERT_BATCH_SIZE:
+            open_bills = {
+                bill_id: bill for bill_id, bill in open_bills.items() if bill[0] >= log["date"] - span
+            }
+            receiving = {id(bucket)} | {id(bill[2]) for bill in open_bills.values()}
+            done = [b for b in buckets if id(b) not in receiving]
+            if done:
+                await db.sales_log_buckets.insert_many(done, ordered=False)
+                written += len(done)
+                buckets = [b for b in buckets if id(b) in receiving]
+
+    if buckets:
+        await db.sales_log_buckets.insert_many(buckets, ordered=False)
+        written += len(buckets)
+
+    return {"lines": lines, "buckets": written}
+
+async def count_bills(db) -> int:
+    result = await db.sales_logs.aggregate([
+        {"$group": {"_id": "$bill_id"}},
+        {"$count": "bills"}
+    ], allowDiskUse=True).to_list(1)
+    return result[0]["bills"] if result else 0
+
+def format_bytes(size: int) -> str:
+    return f"{size / (1024 * 1024):.2f} MiB"
+
+def print_report(before: dict, after: dict, counts: dict, bills: int):
+    print(f"Migrated {counts['lines']} sales lines into {counts['buckets']} buckets")
+    for stats in (before, after):
+        print(
+            f"  {stats['collection']}: {stats['count']} docs, "
+            f"storage {format_bytes(stats['storage_size'])}, "
+            f"indexes {format_bytes(stats['total_index_size'])}"
+        )
+
+    if before["storage_size"]:
+        storage_saved = 1 - after["storage_size"] / before["storage_size"]
+        print(f"  Storage reduction: {storage_saved:.1%}")
+    if before["total_index_size"]:
+        index_saved = 1 - after["total_index_size"] / before["total_index_size"]
+        print(f"  Index size reduction: {index_saved:.1%}")
+
+    if bills:
+        # Documents layout: one insert per line, each touching every index.
+        # Bucketed layout: one upsert per bill; only a new bucket adds index keys.
+        lines_per_bill = counts["lines"] / bills
+        index_writes_before = lines_per_bill * len(before["index_sizes"])
+        index_writes_after = counts["buckets"] * len(after["index_sizes"]) / bills
+        print(
+            f"  Write amplification per bill: documents layout {lines_per_bill:.1f} inserts / "
+            f"{index_writes_before:.1f} index writes, bucketed layout 1 upsert / "
+            f"{index_writes_after:.2f} index writes"
+        )
+
+async def main(drop_source: bool, lag_seconds: int):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'kirana_shop_db')]
+    try:
+        state = await db.schema_migrations.find_one({"_id": STATE_ID})
+        if state is None and await db.sales_log_buckets.estimated_document_count():
+            print("sales_log_buckets is not empty and has no migration state; drop it before migrating")
+            return
+        start = state["migrated_until"] if state else None
+        migrated_lines = state["lines"] if state else 0
+
+        # The final pass takes the whole tail; earlier passes stay clear of in-flight inserts
+        # and leave room to read the last lines of bills started just before the cutoff
+        lag = timedelta(seconds=max(lag_seconds, MAX_BILL_SPAN_SECONDS))
+        end = None if drop_source else datetime.utcnow() - lag
+
+        before = await collection_storage(db, "sales_logs")
+        bills = await count_bills(db)
+        counts = await migrate(db, start, end)
+        migrated_lines += counts["lines"]
+        await db.schema_migrations.update_one(
+            {"_id": STATE_ID},
+            {"$set": {"migrated_until": end or datetime.utcnow(), "lines": migrated_lines}},
+            upsert=True
+        )
+        after = await collection_storage(db, "sales_log_buckets")
+        print_report(before, after, counts, bills)
+        print(f"  {migrated_lines} lines migrated in total")
+
+        if drop_source:
+            # Re-count right before dropping: collStats counts are estimates and
+            # any document-mode writer still running would add lines
+            remaining = await db.sales_logs.count_documents({})
+            if remaining == migrated_lines:
+                await db.sales_logs.drop()
+                print("Dropped sales_logs")
+            else:
+                print(
+                    f"sales_logs holds {remaining} lines but {migrated_lines} were migrated; "
+                    "make sure no worker runs in documents mode, then re-run. sales_logs was left in place"
+                )
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--drop-source", action="store_true",
+        help="final pass once no worker writes documents: copy the tail, verify and drop sales_logs"
+    )
+    parser.add_argument(
+        "--lag-seconds", type=int, default=DEFAULT_LAG_SECONDS,
+        help="leave lines newer than this for a later pass"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.drop_source, args.lag_seconds))
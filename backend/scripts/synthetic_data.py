@@ -0,0 +1,312 @@
+"""Generate a deterministic synthetic multi-store dataset.
+
+Usage (from the backend directory):
+    python -m scripts.synthetic_data --stores 5 --products 500 --bills 5000 [--seed 42] [--anchor 2025-06-30T20:00] [--drop]
+
+Writes users, products, bills and sales logs (in the configured SALES_LOG_MODE)
+into DB_NAME. The same seed and anchor always produce the same documents,
+including their ObjectIds. Store sizes, prices, basket sizes, quantities,
+product popularity and time of day follow skewed distributions resembling a
+kirana store rather than uniform random data. Every store's password is
+"password".
+"""
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timedelta
+from pathlib import Path
+from bson import ObjectId
+import argparse
+import asyncio
+import base64
+import bisect
+import calendar
+import itertools
+import os
+import random
+import struct
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+
+from utils.password import hash_password
+from utils.sales_logs import BUCKET_MAX_BILLS, SALES_LOG_MODE, bucket_hour, build_bucket_entry
+from utils.schema import run_migrations
+
+BRANDS = ["Aashirvaad", "Tata", "Fortune", "Amul", "Britannia", "Parle", "Haldiram", "Dabur", "Surf", "Lux", "Colgate", "Local"]
+ITEMS = {
+    "Grocery": (["Atta", "Basmati Rice", "Sona Masoori Rice", "Toor Dal", "Moong Dal", "Sugar", "Salt", "Besan", "Poha"], 5.0),
+    "Edible Oil": (["Sunflower Oil", "Mustard Oil", "Groundnut Oil", "Ghee"], 5.0),
+    "Dairy": (["Milk", "Curd", "Paneer", "Butter", "Cheese Slices"], 0.0),
+    "Snacks": (["Biscuits", "Namkeen", "Chips", "Rusk", "Cookies"], 18.0),
+    "Beverages": (["Tea", "Coffee", "Soft Drink", "Fruit Juice"], 12.0),
+    "Personal Care": (["Soap", "Shampoo", "Toothpaste", "Hair Oil", "Face Wash"], 18.0),
+    "Household": (["Detergent", "Dishwash Bar", "Floor Cleaner", "Agarbatti"], 18.0),
+    "Tobacco": (["Cigarettes", "Pan Masala"], 28.0)
+}
+CATEGORY_WEIGHTS = [30, 8, 10, 18, 8, 12, 10, 4]
+PACK_SIZES = ["50g", "100g", "200g", "500g", "1kg", "5kg", "10kg", "100ml", "500ml", "1L", "Pack of 4", ""]
+PAYMENT_METHODS = (["cash", "upi", "card"], [55, 35, 10])
+# Share of daily bills per hour, peaking late morning and evening
+HOUR_WEIGHTS = [0, 0, 0, 0, 0, 0, 1, 3, 5, 7, 8, 8, 6, 5, 4, 4, 5, 7, 10, 11, 9, 6, 3, 1]
+CUSTOMERS = ["Ramesh", "Suresh", "Priya", "Anita", "Mohammed", "Lakshmi", "Vikram", "Fatima", "Arjun", "Kavya"]
+
+def make_id(rng: random.Random, created_at: datetime) -> ObjectId:
+    """Deterministic ObjectId whose timestamp matches created_at"""
+    return ObjectId(struct.pack(">I", calendar.timegm(created_at.timetuple())) + rng.getrandbits(64).to_bytes(8, "big"))
+
+def store_sizes(rng: random.Random, stores: int, mean: int, spread: float) -> list:
+    """Lognormal per-store sizes, rescaled so their mean stays close to `mean`"""
+    if spread <= 0 or stores == 1:
+        return [mean] * stores
+    factors = [rng.lognormvariate(0, spread) for _ in range(stores)]
+    scale = stores / sum(factors)
+    return [max(1, round(mean * f * scale)) for f in factors]
+
+def make_user(rng: random.Random, index: int, password_hash: str, anchor: datetime) -> dict:
+    created_at = anchor - timedelta(days=rng.randrange(180, 720))
+    return {
+        "_id": make_id(rng, created_at),
+        "email": f"store{index}@example.com",
+        "password_hash": password_hash,
+        "store_name": f"{rng.choice(CUSTOMERS)} General Store {index}",
+        "owner_name": rng.choice(CUSTOMERS),
+        "phone": f"9{rng.randrange(10**8, 10**9)}",
+        "gst_number": f"29ABCDE{index:04d}F1Z5" if rng.random() < 0.6 else None,
+        "store_code": f"ST{index:04d}",
+        "created_at": created_at
+    }
+
+def make_products(rng: random.Random, user: dict, count: int, store_index: int) -> list:
+    categories = list(ITEMS)
+    products = []
+    for p in range(count):
+        category = rng.choices(categories, CATEGORY_WEIGHTS)[0]
+        names, gst_rate = ITEMS[category]
+        name = " ".join(part for part in (rng.choice(BRANDS), rng.choice(names), rng.choice(PACK_SIZES)) if part)
+
+        # Most stock is healthy; a tail sits at or below the alert level
+        min_stock_alert = rng.choice([5, 10, 10, 10, 20])
+        roll = rng.random()
+        if roll < 0.03:
+            stock = 0
+        elif roll < 0.12:
+            stock = rng.randrange(1, min_stock_alert + 1)
+        else:
+            stock = int(rng.paretovariate(1.5) * 20)
+
+        # A few products carry a photo, which dominates their document size
+        image = None
+        if rng.random() < 0.05:
+            size = rng.randrange(2048, 24576)
+            image = base64.b64encode(rng.getrandbits(8 * size).to_bytes(size, "big")).decode()
+
+        created_at = user["created_at"] + timedelta(minutes=rng.randrange(0, 60 * 24 * 30))
+        products.append({
+            "_id": make_id(rng, created_at),
+            "user_id": str(user["_id"]),
+            "name": name,
+            "barcode": f"89{store_index:04d}{p:07d}",
+            "price": max(1.0, round(rng.lognormvariate(4.1, 0.9) * 2) / 2),
+            "stock": stock,
+            "min_stock_alert": min_stock_alert,
+            "category": category if rng.random() < 0.9 else None,
+            "image_base64": image,
+            "gst_rate": gst_rate,
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(days=rng.randrange(0, 30))
+        })
+    return products
+
+def basket_size(rng: random.Random) -> int:
+    """Mostly small baskets with a long tail of monthly-stock-up bills"""
+    if rng.random() < 0.08:
+        return rng.randrange(10, 41)
+    return min(1 + int(rng.expovariate(1 / 2.5)), 12)
+
+def quantity(rng: random.Random) -> int:
+    roll = rng.random()
+    if roll < 0.7:
+        return 1
+    if roll < 0.88:
+        return 2
+    return rng.randrange(3, 11)
+
+def make_bills(rng: random.Random, user: dict, products: list, count: int, days: int, anchor: datetime) -> list:
+    # Zipf-like popularity: a small head of products appears in most bills
+    ranked = products[:]
+    rng.shuffle(ranked)
+    cumulative = list(itertools.accumulate(1 / (rank + 1) ** 1.1 for rank in range(len(ranked))))
+    hours = list(range(24))
+    methods, method_weights = PAYMENT_METHODS
+
+    anchor_day = anchor.replace(hour=0, minute=0, second=0, microsecond=0)
+    timestamps = []
+    for _ in range(count):
+        created_at = anchor_day - timedelta(days=rng.randrange(0, days)) + timedelta(
+            hours=rng.choices(hours, HOUR_WEIGHTS)[0], minutes=rng.randrange(0, 60), seconds=rng.randrange(0, 60)
+        )
+        # Nothing after the anchor, so today's share of bills ends at the anchor time
+        timestamps.append(created_at if created_at <= anchor else created_at - timedelta(days=1))
+    timestamps.sort()
+
+    bills = []
+    sequence = {}
+    for created_at in timestamps:
+        chosen = {}
+        for _ in range(min(basket_size(rng), len(ranked))):
+            product = ranked[bisect.bisect(cumulative, rng.random() * cumulative[-1])]
+            chosen[product["_id"]] = product
+
+        items = []
+        for product in chosen.values():
+            qty = quantity(rng)
+            item_total = round(product["price"] * qty, 2)
+            items.append({
+                "product_id": str(product["_id"]),
+                "product_name": product["name"],
+                "barcode": product["barcode"],
+                "quantity": qty,
+                "price": product["price"],
+                "gst_rate": product["gst_rate"],
+                "item_total": item_total,
+                "gst_amount": round(item_total * product["gst_rate"] / 100, 2)
+            })
+
+        day = created_at.strftime("%Y%m%d")
+        sequence[day] = sequence.get(day, 0) + 1
+        subtotal = round(sum(i["item_total"] for i in items), 2)
+        gst_amount = round(sum(i["gst_amount"] for i in items), 2)
+        bills.append({
+            "_id": make_id(rng, created_at),
+            "user_id": str(user["_id"]),
+            "bill_number": f"{user['store_code']}-{day}-{str(sequence[day]).zfill(3)}",
+            "items": items,
+            "subtotal": subtotal,
+            "gst_amount": gst_amount,
+            "total": round(subtotal + gst_amount, 2),
+            "payment_method": rng.choices(methods, method_weights)[0],
+            "customer_name": rng.choice(CUSTOMERS) if rng.random() < 0.2 else None,
+            "created_at": created_at
+        })
+    return bills
+
+def make_sales_logs(bills: list) -> list:
+    """Sales log documents for the bills, in the configured SALES_LOG_MODE layout"""
+    if SALES_LOG_MODE != "bucketed":
+        return [
+            {
+                "user_id": bill["user_id"],
+                "product_id": item["product_id"],
+                "product_name": item["product_name"],
+                "quantity": item["quantity"],
+                "price": item["price"],
+                "total": item["item_total"] + item["gst_amount"],
+                "bill_id": str(bill["_id"]),
+                "date": bill["created_at"]
+            }
+            for bill in bills
+            for item in bill["items"]
+        ]
+
+    buckets = []
+    for (user_id, hour), group in itertools.groupby(bills, key=lambda b: (b["user_id"], bucket_hour(b["created_at"]))):
+        group = list(group)
+        for start in range(0, len(group), BUCKET_MAX_BILLS):
+            chunk = group[start:start + BUCKET_MAX_BILLS]
+            buckets.append({
+                "user_id": user_id,
+                "hour": hour,
+                "entries": [build_bucket_entry(str(b["_id"]), b["items"], b["created_at"]) for b in chunk],
+                "bill_count": len(chunk),
+                "line_count": sum(len(b["items"]) for b in chunk)
+            })
+    return buckets
+
+def generate_stores(
+    stores: int,
+    products: int,
+    bills: int,
+    seed: int = 42,
+    days: int = 120,
+    spread: float = 0.5,
+    anchor: datetime = None,
+    password_hash: str = None
+):
+    """Yield one dict per store with its user, products, bills and sales logs.
+
+    products and bills are per-store means; spread is the lognormal sigma of
+    store sizes (0 gives every store exactly that many). anchor is the
+    newest bill timestamp allowed and defaults to now. bcrypt salts each
+    hash, so pass password_hash to make the user documents repeatable too.
+    """
+    anchor = anchor or datetime.utcnow().replace(second=0, microsecond=0)
+    rng = random.Random(seed)
+    product_counts = store_sizes(rng, stores, products, spread)
+    bill_counts = store_sizes(rng, stores, bills, spread)
+    password_hash = password_hash or hash_password("password")
+
+    for index in range(stores):
+        # Each store has its own stream so changing one size does not reshuffle the others
+        store_rng = random.Random(f"{seed}-{index}")
+        user = make_user(store_rng, index, password_hash, anchor)
+        store_products = make_products(store_rng, user, product_counts[index], index)
+        store_bills = make_bills(store_rng, user, store_products, bill_counts[index], days, anchor)
+        yield {
+            "user": user,
+            "products": store_products,
+            "bills": store_bills,
+            "sales_logs": make_sales_logs(store_bills)
+        }
+
+async def load_store(db, store: dict, batch_size: int = 5000):
+    """Insert one generated store"""
+    await db.users.insert_one(store["user"])
+    collection = "sales_log_buckets" if SALES_LOG_MODE == "bucketed" else "sales_logs"
+    for name, docs in (("products", store["products"]), ("bills", store["bills"]), (collection, store["sales_logs"])):
+        for start in range(0, len(docs), batch_size):
+            await db[name].insert_many(docs[start:start + batch_size], ordered=False)
+
+async def load_dataset(db, stores: int, products: int, bills: int, **options) -> list:
+    """Generate and insert a dataset; returns the users and per-store counts"""
+    summary = []
+    for store in generate_stores(stores, products, bills, **options):
+        await load_store(db, store)
+        summary.append({
+            "user": store["user"],
+            "products": len(store["products"]),
+            "bills": len(store["bills"]),
+            "sales_logs": len(store["sales_logs"])
+        })
+    return summary
+
+async def main(args):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ.get('DB_NAME', 'kirana_shop_db')]
+    try:
+        if args.drop:
+            await client.drop_database(db.name)
+        await run_migrations(db)
+        summary = await load_dataset(
+            db, args.stores, args.products, args.bills,
+            seed=args.seed, days=args.days, spread=args.spread, anchor=args.anchor
+        )
+        print(f"Loaded {len(summary)} stores into {db.name}")
+        print(f"{'store':<10}{'email':<26}{'products':>10}{'bills':>10}{'sales logs':>12}")
+        for row in summary:
+            user = row["user"]
+            print(f"{user['store_code']:<10}{user['email']:<26}{row['products']:>10}{row['bills']:>10}{row['sales_logs']:>12}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stores", type=int, default=5)
+    parser.add_argument("--products", type=int, default=500, help="mean products per store")
+    parser.add_argument("--bills", type=int, default=5000, help="mean bills per store")
+    parser.add_argument("--days", type=int, default=120, help="days of bill history")
+    parser.add_argument("--spread", type=float, default=0.5, help="lognormal sigma of store sizes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor", type=datetime.fromisoformat, default=None, help="newest bill time (UTC), default now")
+    parser.add_argument("--drop", action="store_true", help="drop DB_NAME before loading")
+    args = parser.parse_args()
+    asyncio.run(main(args))
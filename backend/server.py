@@ -1,25 +1,40 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, status
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
+import time
 from pathlib import Path
-
-# Import routes
-from routes import auth, products, bills, dashboard
+from typing import Optional
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Import routes
+from routes import auth, products, bills, dashboard, reports
+from utils.schema import verify_schema
+from utils.invalidation import InvalidationBus
+from utils.admission import AdmissionMiddleware, admission_controller
+from utils.profiling import PROFILING_ENABLED, ProfilingMiddleware, is_admin_token, profiling_listeners
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=profiling_listeners())
 db = client[os.environ.get('DB_NAME', 'kirana_shop_db')]
+invalidation_bus = InvalidationBus(db)
 
 # Create the main app
 app = FastAPI(title="Kirana Shop Management API", version="1.0.0")
 
+# Per-store admission control for billing, reporting and catalog routes
+# (added first so CORS headers also wrap 429/503 responses)
+app.add_middleware(AdmissionMiddleware)
+
+# Opt-in request profiling (admin token header or sampling rate)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +49,7 @@ app.include_router(auth.router, prefix="/api")
 app.include_router(products.router, prefix="/api")
 app.include_router(bills.router, prefix="/api")
 app.include_router(dashboard.router, prefix="/api")
+app.include_router(reports.router, prefix="/api")
 
 # Root endpoint
 @app.get("/")
@@ -45,36 +61,29 @@ async def root():
 async def health_check():
     return {"status": "healthy", "database": "connected"}
 
-# Create database indexes on startup
+# Admission control metrics
+# Per-class tenant activity; admin only (X-Profile-Token must match PROFILE_ADMIN_TOKEN)
+@app.get("/api/metrics/admission")
+async def admission_metrics(x_profile_token: Optional[str] = Header(None)):
+    if not is_admin_token(x_profile_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
+    return admission_controller.metrics()
+
+# Verify database schema on startup; migrations run via scripts/migrate.py
 @app.on_event("startup")
 async def startup_db_client():
-    """Create database indexes for performance"""
-    try:
-        # Users collection indexes
-        await db.users.create_index("email", unique=True)
-        await db.users.create_index("store_code", unique=True)
-        
-        # Products collection indexes
-        await db.products.create_index([("user_id", 1), ("barcode", 1)], unique=True)
-        await db.products.create_index("user_id")
-        await db.products.create_index([("user_id", 1), ("name", 1)])
-        
-        # Bills collection indexes
-        await db.bills.create_index("user_id")
-        await db.bills.create_index("bill_number", unique=True)
-        await db.bills.create_index([("user_id", 1), ("created_at", -1)])
-        
-        # Sales logs collection indexes
-        await db.sales_logs.create_index("user_id")
-        await db.sales_logs.create_index([("user_id", 1), ("date", -1)])
-        
-        logging.info("Database indexes created successfully")
-    except Exception as e:
-        logging.error(f"Error creating indexes: {e}")
+    """Verify schema version and required indexes"""
+    started = time.perf_counter()
+    await verify_schema(db)
+    logging.info(f"Database schema verified in {(time.perf_counter() - started) * 1000:.1f} ms")
+    
+    # Subscribe this worker's caches to cross-worker invalidations
+    invalidation_bus.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Close database connection on shutdown"""
+    await invalidation_bus.stop()
     client.close()
 
 # Configure logging
@@ -0,0 +1,162 @@
+from typing import Dict, Optional, Tuple
+from starlette.responses import JSONResponse
+from .jwt_handler import verify_token
+import asyncio
+import os
+
+# Per-store admission control configuration
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+
+# Route class -> (concurrent requests per store, queued requests per store)
+ADMISSION_LIMITS: Dict[str, Tuple[int, int]] = {
+    "billing": (
+        int(os.getenv("ADMISSION_BILLING_CONCURRENCY", "4")),
+        int(os.getenv("ADMISSION_BILLING_QUEUE", "16"))
+    ),
+    "reporting": (
+        int(os.getenv("ADMISSION_REPORTING_CONCURRENCY", "2")),
+        int(os.getenv("ADMISSION_REPORTING_QUEUE", "8"))
+    ),
+    "catalog": (
+        int(os.getenv("ADMISSION_CATALOG_CONCURRENCY", "4")),
+        int(os.getenv("ADMISSION_CATALOG_QUEUE", "16"))
+    )
+}
+
+def classify_request(method: str, path: str) -> Optional[str]:
+    """Map a request to its admission class, or None when it is not limited"""
+    if path.startswith("/api/bills"):
+        return "reporting" if method == "GET" else "billing"
+    if path.startswith("/api/dashboard") or path.startswith("/api/reports"):
+        return "reporting"
+    if path.startswith("/api/products"):
+        return "catalog"
+    return None
+
+def user_id_from_headers(headers: list) -> Optional[str]:
+    """Read the user id from a bearer token without touching the database"""
+    for name, value in headers:
+        if name == b"authorization":
+            parts = value.decode("latin-1").split()
+            if len(parts) == 2 and parts[0].lower() == "bearer":
+                payload = verify_token(parts[1])
+                return payload.get("user_id") if payload else None
+    return None
+
+class _StoreSlot:
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.active = 0
+        self.waiting = 0
+
+class AdmissionController:
+    """Concurrency limit plus bounded wait queue per (store, route class)"""
+
+    def __init__(self, limits: Dict[str, Tuple[int, int]] = ADMISSION_LIMITS):
+        self.limits = limits
+        self._slots: Dict[Tuple[str, str], _StoreSlot] = {}
+        self.counters = {
+            name: {"admitted": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+            for name in limits
+        }
+
+    def _slot(self, key: Tuple[str, str]) -> _StoreSlot:
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _StoreSlot(self.limits[key[1]][0])
+        return slot
+
+    def _release_slot(self, key: Tuple[str, str], slot: _StoreSlot):
+        # Drop idle stores so the table only holds stores with traffic
+        if slot.active == 0 and slot.waiting == 0:
+            self._slots.pop(key, None)
+
+    async def acquire(self, user_id: str, route_class: str) -> Optional[int]:
+        """Wait for a slot; returns an HTTP status code when the request is shed"""
+        key = (user_id, route_class)
+        slot = self._slot(key)
+        counters = self.counters[route_class]
+
+        if slot.semaphore.locked():
+            if slot.waiting >= self.limits[route_class][1]:
+                counters["rejected_queue_full"] += 1
+                self._release_slot(key, slot)
+                return 429
+            slot.waiting += 1
+            try:
+                await asyncio.wait_for(slot.semaphore.acquire(), ADMISSION_QUEUE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                counters["rejected_timeout"] += 1
+                return 503
+            else:
+                slot.active += 1
+            finally:
+                slot.waiting -= 1
+                self._release_slot(key, slot)
+        else:
+            await slot.semaphore.acquire()
+            slot.active += 1
+
+        counters["admitted"] += 1
+        return None
+
+    def release(self, user_id: str, route_class: str):
+        key = (user_id, route_class)
+        slot = self._slots[key]
+        slot.active -= 1
+        slot.semaphore.release()
+        self._release_slot(key, slot)
+
+    def metrics(self) -> dict:
+        classes = {}
+        for name, (concurrency, queue) in self.limits.items():
+            slots = [slot for (_, route_class), slot in self._slots.items() if route_class == name]
+            classes[name] = {
+                "concurrency_limit": concurrency,
+                "queue_limit": queue,
+                "in_flight": sum(slot.active for slot in slots),
+                "queue_depth": sum(slot.waiting for slot in slots),
+                "max_store_queue_depth": max((slot.waiting for slot in slots), default=0),
+                "active_stores": len(slots),
+                **self.counters[name]
+            }
+        return classes
+
+admission_controller = AdmissionController()
+
+class AdmissionMiddleware:
+    """ASGI middleware applying per-store admission control to limited routes"""
+
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if not ADMISSION_ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_request(scope["method"], scope["path"])
+        user_id = user_id_from_headers(scope["headers"]) if route_class else None
+        if user_id is None:
+            # Unlimited route or unauthenticated request; auth rejects the latter
+            await self.app(scope, receive, send)
+            return
+
+        rejected = await self.controller.acquire(user_id, route_class)
+        if rejected:
+            detail = "Too many requests for this store" if rejected == 429 else "Server busy, please retry"
+            response = JSONResponse(
+                {"detail": detail},
+                status_code=rejected,
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(user_id, route_class)
@@ -1,6 +1,7 @@
 from fastapi import HTTPException, Header, status
 from typing import Optional
 from .jwt_handler import verify_token
+from .cache import users_cache
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 
@@ -44,12 +45,18 @@ async def get_current_user(authorization: Optional[str] = Header(None), db = Non
     # Fetch user from database
     if db:
         from bson import ObjectId
+        user = users_cache.get(user_id)
+        if user:
+            return user
+        
+        generation = users_cache.generation(user_id)
         user = await db.users.find_one({"_id": ObjectId(user_id)})
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found"
             )
+        users_cache.set(user_id, user, owner=user_id, generation=generation)
         return user
     
     return {"user_id": user_id}
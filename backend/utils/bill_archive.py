@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+from bson import Binary, ObjectId, decode, encode
+import os
+import zlib
+
+# Cold tier configuration
+# Bills older than BILL_ARCHIVE_AFTER_DAYS are moved into bill_archive, one
+# zlib-compressed document per store per day.
+BILL_ARCHIVE_AFTER_DAYS = int(os.getenv("BILL_ARCHIVE_AFTER_DAYS", "90"))
+BILL_ARCHIVE_COMPRESSION_LEVEL = 6
+
+def archive_cutoff(days: int = BILL_ARCHIVE_AFTER_DAYS, now: Optional[datetime] = None) -> datetime:
+    """Return the start of the first day that stays in the hot tier"""
+    now = now or datetime.utcnow()
+    return (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def compress_bills(bills: List[dict]) -> Binary:
+    return Binary(zlib.compress(encode({"bills": bills}), BILL_ARCHIVE_COMPRESSION_LEVEL))
+
+def decompress_bills(payload: bytes) -> List[dict]:
+    return decode(zlib.decompress(payload))["bills"]
+
+async def ensure_bill_archive_indexes(db):
+    """Create indexes used by the cold tier lookups"""
+    await db.bill_archive.create_index([("user_id", 1), ("day", -1)])
+    await db.bill_archive.create_index("bill_ids")
+
+async def _write_bucket(db, user_id: str, day: datetime, bills: List[dict]):
+    """Upsert a day bucket, merging with bills archived by an earlier interrupted run"""
+    existing = await db.bill_archive.find_one({"user_id": user_id, "day": day})
+    if existing:
+        merged = {b["_id"]: b for b in decompress_bills(existing["payload"])}
+        merged.update({b["_id"]: b for b in bills})
+        bills = list(merged.values())
+
+    bills.sort(key=lambda b: b["created_at"], reverse=True)
+    await db.bill_archive.replace_one(
+        {"user_id": user_id, "day": day},
+        {
+            "user_id": user_id,
+            "day": day,
+            "count": len(bills),
+            "first_created_at": bills[-1]["created_at"],
+            "last_created_at": bills[0]["created_at"],
+            "bill_ids": [b["_id"] for b in bills],
+            "payload": compress_bills(bills)
+        },
+        upsert=True
+    )
+
+async def archive_bills(db, older_than_days: int = BILL_ARCHIVE_AFTER_DAYS) -> dict:
+    """Move bills created before the cutoff into the cold tier"""
+    cutoff = archive_cutoff(older_than_days)
+    archived = 0
+    buckets = 0
+
+    current_key = None
+    current_bills = []
+
+    async def flush():
+        nonlocal archived, buckets
+        if not current_bills:
+            return
+        user_id, day = current_key
+        await _write_bucket(db, user_id, day, current_bills)
+        await db.bills.delete_many({"_id": {"$in": [b["_id"] for b in current_bills]}})
+        archived += len(current_bills)
+        buckets += 1
+
+    # Matches the (user_id 1, created_at -1) index; _write_bucket re-sorts each day
+    cursor = db.bills.find({"created_at": {"$lt": cutoff}}).sort([("user_id", 1), ("created_at", -1)])
+    async for bill in cursor:
+        key = (bill["user_id"], bill["created_at"].replace(hour=0, minute=0, second=0, microsecond=0))
+        if key != current_key:
+            await flush()
+            current_key = key
+            current_bills = []
+        current_bills.append(bill)
+    await flush()
+
+    return {"cutoff": cutoff, "archived": archived, "buckets": buckets}
+
+async def find_archived_bill(db, user_id: str, bill_id: ObjectId) -> Optional[dict]:
+    """Look up a single bill in the cold tier"""
+    bucket = await db.bill_archive.find_one({"bill_ids": bill_id, "user_id": user_id})
+    if not bucket:
+        return None
+    for bill in decompress_bills(bucket["payload"]):
+        if bill["_id"] == bill_id:
+            return bill
+    return None
+
+async def find_archived_bills(
+    db,
+    user_id: str,
+    skip: int,
+    limit: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> List[dict]:
+    """Return archived bills newest first, paging without decompressing skipped buckets"""
+    query = {"user_id": user_id}
+    if start_date:
+        query["last_created_at"] = {"$gte": start_date}
+    if end_date:
+        query["first_created_at"] = {"$lt": end_date}
+
+    # Per-bill date filtering needs the payload, so bucket counts can only be
+    # used to skip whole buckets when no date range is requested
+    exact_counts = start_date is None and end_date is None
+    projection = None if not exact_counts else {"count": 1}
+
+    results = []
+    async for bucket in db.bill_archive.find(query, projection).sort("day", -1):
+        if exact_counts and skip >= bucket["count"]:
+            skip -= bucket["count"]
+            continue
+
+        if exact_counts:
+            bucket = await db.bill_archive.find_one({"_id": bucket["_id"]})
+
+        for bill in decompress_bills(bucket["payload"]):
+            if start_date and bill["created_at"] < start_date:
+                continue
+            if end_date and bill["created_at"] >= end_date:
+                continue
+            if skip:
+                skip -= 1
+                continue
+            results.append(bill)
+            if len(results) >= limit:
+                return results
+
+    return results
+
+async def iter_archived_bills(db, user_id: str, start_date: datetime, end_date: datetime):
+    """Yield archived bills created in [start_date, end_date), oldest bucket first"""
+    query = {
+        "user_id": user_id,
+        "last_created_at": {"$gte": start_date},
+        "first_created_at": {"$lt": end_date}
+    }
+    async for bucket in db.bill_archive.find(query).sort("day", 1):
+        for bill in decompress_bills(bucket["payload"]):
+            if start_date <= bill["created_at"] < end_date:
+                yield bill
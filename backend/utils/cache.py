@@ -0,0 +1,93 @@
+from typing import Any, Dict, Hashable, Optional, Set
+import os
+import time
+
+# In-process caching is only safe while the change stream invalidation bus is
+# running, so caches stay inactive until the bus marks them active
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "false").lower() == "true"
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+class LocalCache:
+    """Per-worker TTL cache whose entries can be invalidated by key or owner id
+
+    Readers capture generation() before reading from Mongo and pass it to
+    set(); an invalidation handled while the read was pending bumps the
+    generation, so the stale value is dropped instead of cached.
+    """
+
+    def __init__(self, name: str, ttl_seconds: int = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.active = False
+        self._entries: Dict[Hashable, tuple] = {}
+        self._owners: Dict[Hashable, Set[Hashable]] = {}
+        # Bumped by clear(); per-owner counters and the cache-wide counter by invalidate_owner()
+        self._epoch = 0
+        self._counter = 0
+        self._owner_generations: Dict[Hashable, int] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.active:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if expires_at < time.monotonic():
+            self.invalidate(key)
+            return None
+        return value
+
+    def generation(self, owner: Optional[Hashable] = None) -> tuple:
+        """Token for set(); without an owner any owner invalidation changes it"""
+        counter = self._counter if owner is None else self._owner_generations.get(owner, 0)
+        return (owner, self._epoch, counter)
+
+    def set(self, key: Hashable, value: Any, owner: Optional[Hashable] = None, generation: Optional[tuple] = None):
+        if not self.active:
+            return
+        if generation is not None and generation != self.generation(generation[0]):
+            # Invalidated while the value was being read
+            return
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            # Evict the oldest entry (dicts keep insertion order)
+            self.invalidate(next(iter(self._entries)))
+        self.invalidate(key)
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds, owner)
+        if owner is not None:
+            self._owners.setdefault(owner, set()).add(key)
+
+    def invalidate(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry and entry[2] is not None:
+            keys = self._owners.get(entry[2])
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._owners[entry[2]]
+
+    def invalidate_owner(self, owner: Hashable):
+        self._counter += 1
+        self._owner_generations[owner] = self._owner_generations.get(owner, 0) + 1
+        for key in list(self._owners.get(owner, ())):
+            self.invalidate(key)
+
+    def clear(self):
+        self._epoch += 1
+        self._entries.clear()
+        self._owners.clear()
+        self._owner_generations.clear()
+
+users_cache = LocalCache("users")
+products_cache = LocalCache("products")
+dashboard_cache = LocalCache("dashboard")
+
+CACHES = [users_cache, products_cache, dashboard_cache]
+
+def set_caches_active(active: bool):
+    """Enable or disable every cache, dropping entries on each transition"""
+    for cache in CACHES:
+        cache.clear()
+        cache.active = active and CACHE_ENABLED
@@ -0,0 +1,8 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+def to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to the naive UTC form stored in MongoDB"""
+    if value and value.tzinfo:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
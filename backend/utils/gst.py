@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from .bill_archive import iter_archived_bills
+import os
+
+# Longest period one report request may cover; each closed month costs a summary lookup
+GST_REPORT_MAX_DAYS = int(os.getenv("GST_REPORT_MAX_DAYS", "400"))
+
+def month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def next_month(value: datetime) -> datetime:
+    return month_start(month_start(value) + timedelta(days=32))
+
+def _empty_slab() -> dict:
+    return {"taxable_value": 0.0, "tax_amount": 0.0, "quantity": 0, "lines": 0}
+
+def _add_slab(slabs: Dict[float, dict], rate: float, slab: dict):
+    target = slabs.setdefault(float(rate), _empty_slab())
+    for field in target:
+        target[field] += slab[field]
+
+async def aggregate_period(db, user_id: str, start: datetime, end: datetime) -> dict:
+    """Sum taxable value and tax per GST rate for bills created in [start, end)"""
+    slabs: Dict[float, dict] = {}
+    match = {"user_id": user_id, "created_at": {"$gte": start, "$lt": end}}
+
+    # Hot tier: grouping happens on the server, only one row per rate comes back
+    cursor = db.bills.aggregate([
+        {"$match": match},
+        {"$unwind": "$items"},
+        {"$group": {
+            "_id": "$items.gst_rate",
+            "taxable_value": {"$sum": "$items.item_total"},
+            "tax_amount": {"$sum": "$items.gst_amount"},
+            "quantity": {"$sum": "$items.quantity"},
+            "lines": {"$sum": 1}
+        }}
+    ])
+    async for row in cursor:
+        _add_slab(slabs, row["_id"], row)
+    bills = await db.bills.count_documents(match)
+
+    # Cold tier: archived bills are only readable after decompression
+    async for bill in iter_archived_bills(db, user_id, start, end):
+        bills += 1
+        for item in bill["items"]:
+            _add_slab(slabs, item["gst_rate"], {
+                "taxable_value": item["item_total"],
+                "tax_amount": item["gst_amount"],
+                "quantity": item["quantity"],
+                "lines": 1
+            })
+
+    return {"slabs": slabs, "bills": bills}
+
+def _slabs_to_list(slabs: Dict[float, dict]) -> list:
+    return [{"gst_rate": rate, **slabs[rate]} for rate in sorted(slabs)]
+
+async def get_month_summary(db, user_id: str, month: datetime) -> dict:
+    """Return a closed month's summary, materializing it on first use
+
+    Months without bills are not stored, so probing empty history leaves no documents.
+    """
+    summary = await db.gst_monthly_summaries.find_one({"user_id": user_id, "month": month})
+    if summary:
+        return summary
+
+    period = await aggregate_period(db, user_id, month, next_month(month))
+    summary = {
+        "user_id": user_id,
+        "month": month,
+        "slabs": _slabs_to_list(period["slabs"]),
+        "bills": period["bills"],
+        "computed_at": datetime.utcnow()
+    }
+    if not period["bills"]:
+        return summary
+    await db.gst_monthly_summaries.replace_one(
+        {"user_id": user_id, "month": month}, summary, upsert=True
+    )
+    return summary
+
+async def gst_report(db, user_id: str, start: datetime, end: datetime, now: Optional[datetime] = None) -> dict:
+    """Build the per-slab GST report for [start, end)"""
+    open_month = month_start(now or datetime.utcnow())
+    slabs: Dict[float, dict] = {}
+    bills = 0
+
+    # Split the period into closed whole months and partial/open pieces
+    months = []
+    pieces = []
+    cursor = start
+    while cursor < end:
+        piece_end = min(next_month(cursor), end)
+        if cursor == month_start(cursor) and piece_end == next_month(cursor) and piece_end <= open_month:
+            months.append(cursor)
+        else:
+            pieces.append((cursor, piece_end))
+        cursor = piece_end
+
+    # Closed months come from materialized summaries in one query
+    summaries = {}
+    if months:
+        async for summary in db.gst_monthly_summaries.find({"user_id": user_id, "month": {"$in": months}}):
+            summaries[summary["month"]] = summary
+    for month in months:
+        summary = summaries.get(month) or await get_month_summary(db, user_id, month)
+        for slab in summary["slabs"]:
+            _add_slab(slabs, slab["gst_rate"], slab)
+        bills += summary["bills"]
+
+    for piece_start, piece_end in pieces:
+        period = await aggregate_period(db, user_id, piece_start, piece_end)
+        for rate, slab in period["slabs"].items():
+            _add_slab(slabs, rate, slab)
+        bills += period["bills"]
+
+    slab_list = [
+        {**slab, "taxable_value": round(slab["taxable_value"], 2), "tax_amount": round(slab["tax_amount"], 2)}
+        for slab in _slabs_to_list(slabs)
+    ]
+    return {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "slabs": slab_list,
+        "total_taxable_value": round(sum(s["taxable_value"] for s in slabs.values()), 2),
+        "total_tax": round(sum(s["tax_amount"] for s in slabs.values()), 2),
+        "bills": bills,
+        "summary_months": len(months)
+    }
+
+async def materialize_closed_months(db, before: datetime) -> int:
+    """Precompute summaries for every closed month with bills created before `before`"""
+    limit = min(month_start(before), month_start(datetime.utcnow()))
+    months = db.bills.aggregate([
+        {"$match": {"created_at": {"$lt": limit}}},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "month": {"$dateToString": {"format": "%Y-%m", "date": "$created_at"}}
+            }
+        }}
+    ], allowDiskUse=True)
+
+    materialized = 0
+    async for row in months:
+        month = datetime.strptime(row["_id"]["month"], "%Y-%m")
+        await get_month_summary(db, row["_id"]["user_id"], month)
+        materialized += 1
+    return materialized
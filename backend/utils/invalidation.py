@@ -0,0 +1,139 @@
+from datetime import datetime
+from typing import Iterable, Optional
+from pymongo.errors import OperationFailure, PyMongoError
+from .cache import CACHE_ENABLED, dashboard_cache, products_cache, set_caches_active, users_cache
+import asyncio
+import logging
+import os
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+# Workers sharing a name share a stored resume token
+CACHE_BUS_NAME = os.getenv("CACHE_BUS_NAME", socket.gethostname())
+TOKEN_SAVE_INTERVAL_SECONDS = 5
+RETRY_DELAY_SECONDS = 5
+
+WATCHED_COLLECTIONS = ["users", "products", "bills"]
+
+# Server error codes that mean the stored resume token can no longer be used
+CHANGE_STREAM_FATAL_ERROR = 280
+CHANGE_STREAM_HISTORY_LOST = 286
+# $changeStream is only available on replica sets and sharded clusters
+CHANGE_STREAM_NOT_SUPPORTED = 40573
+
+def handle_change(change: dict):
+    """Invalidate local cache entries affected by a single change event"""
+    operation = change["operationType"]
+    if operation in ("drop", "dropDatabase", "rename", "invalidate"):
+        for cache in (users_cache, products_cache, dashboard_cache):
+            cache.clear()
+        return
+
+    collection = change["ns"]["coll"]
+    document_id = str(change["documentKey"]["_id"])
+    user_id = (change.get("fullDocument") or {}).get("user_id")
+
+    if collection == "users":
+        users_cache.invalidate_owner(document_id)
+    elif collection == "products":
+        products_cache.invalidate_owner(document_id)
+        if user_id:
+            dashboard_cache.invalidate_owner(user_id)
+        else:
+            dashboard_cache.clear()
+    elif collection == "bills":
+        if user_id:
+            dashboard_cache.invalidate_owner(user_id)
+        else:
+            dashboard_cache.clear()
+
+def invalidate_local_writes(user_id: str, product_ids: Iterable[str] = ()):
+    """Drop this worker's entries for its own writes without waiting for the change stream"""
+    for product_id in product_ids:
+        products_cache.invalidate_owner(product_id)
+    dashboard_cache.invalidate_owner(user_id)
+
+class InvalidationBus:
+    """Follows a change stream and applies it to this worker's caches"""
+
+    def __init__(self, db, name: str = CACHE_BUS_NAME):
+        self.db = db
+        self.name = name
+        self._task: Optional[asyncio.Task] = None
+        self._saved_token = None
+        self._saved_at = 0.0
+
+    async def _load_token(self):
+        state = await self.db.change_stream_tokens.find_one({"_id": self.name})
+        return state["token"] if state else None
+
+    async def _save_token(self, token, force: bool = False):
+        now = time.monotonic()
+        if token is None or token == self._saved_token:
+            return
+        if not force and now - self._saved_at < TOKEN_SAVE_INTERVAL_SECONDS:
+            return
+        await self.db.change_stream_tokens.update_one(
+            {"_id": self.name},
+            {"$set": {"token": token, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        self._saved_token = token
+        self._saved_at = now
+
+    async def run(self):
+        try:
+            token = await self._load_token()
+        except PyMongoError:
+            token = None
+        while True:
+            try:
+                async with self.db.watch(
+                    [{"$match": {"ns.coll": {"$in": WATCHED_COLLECTIONS}}}],
+                    full_document="updateLookup",
+                    resume_after=token
+                ) as stream:
+                    set_caches_active(True)
+                    logger.info(f"Cache invalidation bus '{self.name}' subscribed")
+                    while stream.alive:
+                        change = await stream.try_next()
+                        if change is not None:
+                            handle_change(change)
+                        token = stream.resume_token
+                        await self._save_token(token)
+            except asyncio.CancelledError:
+                set_caches_active(False)
+                try:
+                    await self._save_token(token, force=True)
+                except PyMongoError:
+                    pass
+                raise
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_NOT_SUPPORTED:
+                    set_caches_active(False)
+                    logger.warning("Change streams need a replica set; in-process caching stays disabled")
+                    return
+                if e.code in (CHANGE_STREAM_FATAL_ERROR, CHANGE_STREAM_HISTORY_LOST):
+                    token = None
+                logger.error(f"Cache invalidation bus error: {e}")
+            except PyMongoError as e:
+                logger.error(f"Cache invalidation bus error: {e}")
+
+            # Entries may have missed invalidations while the stream was down
+            set_caches_active(False)
+            await asyncio.sleep(RETRY_DELAY_SECONDS)
+
+    def start(self):
+        if CACHE_ENABLED and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,37 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, Tuple
+
+TWO_PLACES = Decimal("0.01")
+HUNDRED = Decimal(100)
+
+def to_decimal(value) -> Decimal:
+    # Go through str so stored floats keep their printed value (0.1, not 0.1000000000000000055...)
+    return Decimal(str(value))
+
+def to_money(value: Decimal) -> Decimal:
+    return value.quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+def price_line(product: dict, quantity: int) -> dict:
+    """Price one cart line from the stored product, rounding each amount to paise"""
+    price = to_decimal(product["price"])
+    item_total = to_money(price * quantity)
+    gst_amount = to_money(item_total * to_decimal(product["gst_rate"]) / HUNDRED)
+    return {
+        "product_id": str(product["_id"]),
+        "product_name": product["name"],
+        "barcode": product["barcode"],
+        "quantity": quantity,
+        "price": float(price),
+        "gst_rate": product["gst_rate"],
+        "item_total": float(item_total),
+        "gst_amount": float(gst_amount)
+    }
+
+def cart_totals(lines: Iterable[dict]) -> Tuple[float, float, float]:
+    """Return (subtotal, gst_amount, total) of priced lines"""
+    subtotal = Decimal(0)
+    gst_amount = Decimal(0)
+    for line in lines:
+        subtotal += to_decimal(line["item_total"])
+        gst_amount += to_decimal(line["gst_amount"])
+    return float(subtotal), float(gst_amount), float(subtotal + gst_amount)
@@ -0,0 +1,244 @@
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+import asyncio
+import cProfile
+import functools
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import time
+import uuid
+
+try:
+    from pyinstrument import Profiler as StatisticalProfiler
+except ImportError:  # fall back to cProfile when pyinstrument is not installed
+    StatisticalProfiler = None
+
+logger = logging.getLogger(__name__)
+
+# Profiling is off unless an admin token or a sampling rate is configured
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(Path(__file__).parent.parent / "profiles")))
+PROFILING_ENABLED = bool(PROFILE_ADMIN_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """True when token matches the configured PROFILE_ADMIN_TOKEN"""
+    return bool(PROFILE_ADMIN_TOKEN) and bool(token) and hmac.compare_digest(token, PROFILE_ADMIN_TOKEN)
+
+current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+class RequestProfile:
+    """Phase timings collected for one profiled request"""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.marks = {}
+        self.mongo_seconds = 0.0
+        self.mongo_commands = 0
+
+    def mark(self, name: str):
+        self.marks[name] = time.perf_counter()
+
+    def add_mongo(self, seconds: float):
+        # Called from Motor's executor threads; float += under the GIL is fine here
+        self.mongo_seconds += seconds
+        self.mongo_commands += 1
+
+    def phases(self) -> dict:
+        """Milliseconds per phase; validation/encoding are measured around the endpoint"""
+        def span(start: str, end: str) -> Optional[float]:
+            if start in self.marks and end in self.marks:
+                return round((self.marks[end] - self.marks[start]) * 1000, 3)
+            return None
+
+        return {
+            "total": round((self.marks.get("done", time.perf_counter()) - self.started) * 1000, 3),
+            "request_validation": span("route_start", "endpoint_start"),
+            "handler": span("endpoint_start", "endpoint_end"),
+            "mongo": round(self.mongo_seconds * 1000, 3),
+            "mongo_commands": self.mongo_commands,
+            "response_encoding": span("endpoint_end", "route_end")
+        }
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f"{name};dur={value}"
+            for name, value in self.phases().items()
+            if name != "mongo_commands" and value is not None
+        )
+
+class MongoTimingListener(monitoring.CommandListener):
+    """Adds driver-measured command durations to the active request profile"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        profile = current_profile.get()
+        if profile is not None:
+            profile.add_mongo(event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        self.succeeded(event)
+
+def profiling_listeners() -> List[monitoring.CommandListener]:
+    """Event listeners to pass to the Mongo client; none when profiling is off"""
+    return [MongoTimingListener()] if PROFILING_ENABLED else []
+
+class _ProfiledRoute(APIRoute):
+    """APIRoute that marks when the endpoint starts and ends for profiled requests"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kw):
+            profile = current_profile.get()
+            if profile is None:
+                return await endpoint(*args, **kw)
+            profile.mark("endpoint_start")
+            try:
+                return await endpoint(*args, **kw)
+            finally:
+                profile.mark("endpoint_end")
+
+        super().__init__(path, timed_endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request):
+            profile = current_profile.get()
+            if profile is None:
+                return await handler(request)
+            profile.mark("route_start")
+            response = await handler(request)
+            profile.mark("route_end")
+            return response
+
+        return profiled_handler
+
+# Routers use this as route_class; plain APIRoute keeps the disabled path untouched
+ProfiledRoute = _ProfiledRoute if PROFILING_ENABLED else APIRoute
+
+class _Sampler:
+    """Statistical profiler when available, cProfile otherwise"""
+
+    def __init__(self):
+        if StatisticalProfiler is not None:
+            self._profiler = StatisticalProfiler(async_mode="enabled")
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if StatisticalProfiler is not None:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if StatisticalProfiler is not None:
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def report(self) -> str:
+        if StatisticalProfiler is not None:
+            return self._profiler.output_text(unicode=False, color=False)
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        return out.getvalue()
+
+def _write_profile(profile: RequestProfile, report: dict):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    name = profile.path.strip("/").replace("/", "_") or "root"
+    target = PROFILE_DIR / f"{stamp}_{profile.method}_{name}_{profile.id}.json"
+    target.write_text(json.dumps(report, indent=2))
+    logger.info(f"Request profile written to {target}")
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling admin-requested or sampled requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _mode(self, scope) -> Optional[str]:
+        headers = dict(scope["headers"])
+        token = headers.get(b"x-profile-token", b"").decode("latin-1")
+        if is_admin_token(token):
+            return "inline" if headers.get(b"x-profile", b"").lower() == b"inline" else "file"
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return "file"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        mode = self._mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        context_token = current_profile.set(profile)
+        sampler = _Sampler()
+        status_code = None
+
+        async def profiled_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            if mode == "inline":
+                # The report replaces the original response
+                return
+            if message["type"] == "http.response.start":
+                profile.mark("done")
+                message.setdefault("headers", []).append(
+                    (b"server-timing", profile.server_timing().encode("latin-1"))
+                )
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            sampler.stop()
+            profile.mark("done")
+            current_profile.reset(context_token)
+
+        report = {
+            "id": profile.id,
+            "method": profile.method,
+            "path": profile.path,
+            "status_code": status_code,
+            "phases_ms": profile.phases()
+        }
+
+        if mode == "file":
+            # The response is already sent; render and write off the event loop
+            report["profile"] = await asyncio.to_thread(sampler.report)
+            await asyncio.to_thread(_write_profile, profile, report)
+            return
+
+        report["profile"] = sampler.report()
+
+        body = json.dumps(report).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"server-timing", profile.server_timing().encode("latin-1"))
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+from bson import ObjectId
+from starlette.responses import Response
+
+try:
+    import msgpack
+except ImportError:  # MessagePack responses are optional
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+JSON_MEDIA_TYPE = "application/json"
+
+def _accept_qualities(accept: str) -> dict:
+    """Map each media range in an Accept header to its q-value"""
+    qualities = {}
+    for media_range in accept.split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[media_type.lower()] = quality
+    return qualities
+
+def _quality(qualities: dict, media_type: str) -> float:
+    """q-value of media_type under its most specific matching range"""
+    for media_range in (media_type, media_type.split("/")[0] + "/*", "*/*"):
+        if media_range in qualities:
+            return qualities[media_range]
+    return 0.0
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """True when the client named MessagePack at least as preferred as JSON and it can be produced
+
+    Wildcards never select MessagePack on their own, so */* keeps getting JSON.
+    """
+    if msgpack is None or not accept:
+        return False
+    qualities = _accept_qualities(accept)
+    msgpack_quality = qualities.get(MSGPACK_MEDIA_TYPE, 0.0)
+    return msgpack_quality > 0 and msgpack_quality >= _quality(qualities, JSON_MEDIA_TYPE)
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Stored datetimes are naive UTC; send them as the msgpack timestamp extension
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return msgpack.Timestamp.from_datetime(value)
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+def encode_document(doc: dict, fields: Iterable[str]) -> dict:
+    """Shape a raw Mongo document like its response model, without validation"""
+    encoded = {"id": str(doc["_id"])}
+    for field in fields:
+        if field != "id":
+            encoded[field] = doc.get(field)
+    return encoded
+
+def vary_on_accept(response: Response):
+    """Mark a content-negotiated response so HTTP caches key it on Accept"""
+    response.headers.add_vary_header("Accept")
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def __init__(self, content: Any, *args, **kwargs):
+        super().__init__(content, *args, **kwargs)
+        vary_on_accept(self)
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_encode_default)
+
+def negotiate(content: Any, accept: Optional[str], response: Response) -> Any:
+    """Return content as MessagePack when requested, otherwise unchanged for JSON
+
+    response is the route's injected Response; it gets Vary: Accept for JSON.
+    """
+    if wants_msgpack(accept):
+        return MsgPackResponse(content)
+    vary_on_accept(response)
+    return content
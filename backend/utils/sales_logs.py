@@ -0,0 +1,99 @@
+from datetime import datetime
+from typing import List
+from pymongo.errors import OperationFailure
+import os
+
+# Sales log storage configuration
+# "documents": one sales_logs document per bill line (original layout)
+# "bucketed": one sales_log_buckets document per store per hour
+SALES_LOG_MODE = os.getenv("SALES_LOG_MODE", "documents").lower()
+SALES_LOG_RETENTION_DAYS = int(os.getenv("SALES_LOG_RETENTION_DAYS", "0"))
+BUCKET_MAX_BILLS = int(os.getenv("SALES_LOG_BUCKET_MAX_BILLS", "200"))
+
+def bucket_hour(date: datetime) -> datetime:
+    """Truncate a timestamp to the start of its hour bucket"""
+    return date.replace(minute=0, second=0, microsecond=0)
+
+def build_bucket_entry(bill_id: str, items: List[dict], date: datetime) -> dict:
+    """Build the compact per-bill entry stored inside an hour bucket"""
+    return {
+        "bill_id": bill_id,
+        "date": date,
+        "lines": [
+            {
+                "product_id": item["product_id"],
+                "product_name": item["product_name"],
+                "quantity": item["quantity"],
+                "price": item["price"],
+                "total": item["item_total"] + item["gst_amount"]
+            }
+            for item in items
+        ]
+    }
+
+async def record_sales(db, user_id: str, bill_id: str, items: List[dict], date: datetime):
+    """Record the sales lines of a bill in the configured storage layout"""
+    if SALES_LOG_MODE == "bucketed":
+        # One upsert per bill; a full bucket makes the filter miss and opens a new one
+        await db.sales_log_buckets.update_one(
+            {
+                "user_id": user_id,
+                "hour": bucket_hour(date),
+                "bill_count": {"$lt": BUCKET_MAX_BILLS}
+            },
+            {
+                "$push": {"entries": build_bucket_entry(bill_id, items, date)},
+                "$inc": {"bill_count": 1, "line_count": len(items)}
+            },
+            upsert=True
+        )
+        return
+
+    await db.sales_logs.insert_many([
+        {
+            "user_id": user_id,
+            "product_id": item["product_id"],
+            "product_name": item["product_name"],
+            "quantity": item["quantity"],
+            "price": item["price"],
+            "total": item["item_total"] + item["gst_amount"],
+            "bill_id": bill_id,
+            "date": date
+        }
+        for item in items
+    ], ordered=False)
+
+async def _ensure_ttl_index(collection, field: str, name: str):
+    """Create or update a TTL index according to SALES_LOG_RETENTION_DAYS"""
+    if SALES_LOG_RETENTION_DAYS <= 0:
+        return
+
+    expire_after = SALES_LOG_RETENTION_DAYS * 86400
+    try:
+        await collection.create_index(field, name=name, expireAfterSeconds=expire_after)
+    except OperationFailure:
+        # Index exists with a different expiry; change it in place
+        await collection.database.command({
+            "collMod": collection.name,
+            "index": {"name": name, "expireAfterSeconds": expire_after}
+        })
+
+async def ensure_sales_log_indexes(db):
+    """Create indexes for the configured sales log layout"""
+    if SALES_LOG_MODE == "bucketed":
+        await db.sales_log_buckets.create_index([("user_id", 1), ("hour", -1)])
+        await _ensure_ttl_index(db.sales_log_buckets, "hour", "hour_ttl")
+    else:
+        await db.sales_logs.create_index([("user_id", 1), ("date", -1)])
+        await _ensure_ttl_index(db.sales_logs, "date", "date_ttl")
+
+async def collection_storage(db, name: str) -> dict:
+    """Return storage, index size and document count for a collection"""
+    stats = await db.command("collStats", name)
+    return {
+        "collection": name,
+        "count": stats.get("count", 0),
+        "storage_size": stats.get("storageSize", 0),
+        "total_index_size": stats.get("totalIndexSize", 0),
+        "index_sizes": stats.get("indexSizes", {})
+    }
@@ -0,0 +1,119 @@
+from datetime import datetime
+from typing import Dict, List
+from .sales_logs import SALES_LOG_MODE, ensure_sales_log_indexes
+from .bill_archive import ensure_bill_archive_indexes
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Indexes every worker needs before serving requests, as index key lists
+REQUIRED_INDEXES: Dict[str, List[list]] = {
+    "users": [
+        [("email", 1)],
+        [("store_code", 1)]
+    ],
+    "products": [
+        [("user_id", 1), ("barcode", 1)],
+        [("user_id", 1), ("name", 1)]
+    ],
+    "bills": [
+        [("bill_number", 1)],
+        [("user_id", 1), ("created_at", -1)]
+    ],
+    "gst_monthly_summaries": [
+        [("user_id", 1), ("month", 1)]
+    ],
+    "stock_adjustments": [
+        [("user_id", 1), ("created_at", -1)]
+    ],
+    "bill_archive": [
+        [("user_id", 1), ("day", -1)],
+        [("bill_ids", 1)]
+    ]
+}
+
+if SALES_LOG_MODE == "bucketed":
+    REQUIRED_INDEXES["sales_log_buckets"] = [[("user_id", 1), ("hour", -1)]]
+else:
+    REQUIRED_INDEXES["sales_logs"] = [[("user_id", 1), ("date", -1)]]
+
+async def _create_baseline_indexes(db):
+    await db.users.create_index("email", unique=True)
+    await db.users.create_index("store_code", unique=True)
+    await db.products.create_index([("user_id", 1), ("barcode", 1)], unique=True)
+    await db.products.create_index([("user_id", 1), ("name", 1)])
+    await db.bills.create_index("bill_number", unique=True)
+    await db.bills.create_index([("user_id", 1), ("created_at", -1)])
+
+async def _drop_redundant_user_id_indexes(db):
+    # Every query filtering on user_id alone is served by a compound index
+    # with user_id as its prefix
+    for collection in (db.products, db.bills, db.sales_logs):
+        indexes = await collection.index_information()
+        if "user_id_1" in indexes:
+            await collection.drop_index("user_id_1")
+
+async def _create_gst_summary_index(db):
+    await db.gst_monthly_summaries.create_index([("user_id", 1), ("month", 1)], unique=True)
+
+async def _create_stock_adjustment_index(db):
+    await db.stock_adjustments.create_index([("user_id", 1), ("created_at", -1)])
+
+# Ordered schema migrations; append new steps, never edit applied ones
+MIGRATIONS = [
+    (1, "Create baseline indexes", _create_baseline_indexes),
+    (2, "Drop user_id indexes covered by compound indexes", _drop_redundant_user_id_indexes),
+    (3, "Create GST monthly summary index", _create_gst_summary_index),
+    (4, "Create stock adjustment log index", _create_stock_adjustment_index)
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+async def get_schema_version(db) -> int:
+    state = await db.schema_migrations.find_one({"_id": "schema"})
+    return state["version"] if state else 0
+
+async def run_migrations(db) -> List[int]:
+    """Apply pending migrations in order and refresh config-driven indexes"""
+    current = await get_schema_version(db)
+    applied = []
+
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info(f"Applying schema migration {version}: {description}")
+        await step(db)
+        await db.schema_migrations.update_one(
+            {"_id": "schema"},
+            {"$set": {"version": version, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        applied.append(version)
+
+    # Layout and retention depend on configuration, so these are always synced
+    await ensure_sales_log_indexes(db)
+    await ensure_bill_archive_indexes(db)
+
+    return applied
+
+async def _missing_indexes(collection, required: List[list]) -> List[str]:
+    existing = [list(index["key"].items()) async for index in collection.list_indexes()]
+    return [
+        f"{collection.name}{keys}"
+        for keys in required
+        if keys not in existing
+    ]
+
+async def verify_schema(db):
+    """Check the schema version and required indexes without modifying anything"""
+    version, *missing = await asyncio.gather(
+        get_schema_version(db),
+        *(_missing_indexes(db[name], required) for name, required in REQUIRED_INDEXES.items())
+    )
+    missing = [index for indexes in missing for index in indexes]
+
+    if version < SCHEMA_VERSION or missing:
+        raise RuntimeError(
+            f"Database schema is at version {version} (expected {SCHEMA_VERSION}), "
+            f"missing indexes: {missing or 'none'}. Run `python -m scripts.migrate` first."
+        )
@@ -64,6 +64,7 @@ export const billsAPI = {
   getAll: (params?: any) => api.get('/bills', { params }),
   getById: (id: string) => api.get(`/bills/${id}`),
   create: (data: any) => api.post('/bills', data),
+  quote: (items: { barcode: string; quantity: number }[]) => api.post('/bills/quote', { items }),
 };
 
 // Dashboard APIs
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from pymongo import MongoClient, monitoring
+from pymongo.errors import PyMongoError
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Suites that need a real server point at a throwaway database on it
+TEST_MONGO_URL = os.getenv("TEST_MONGO_URL", "mongodb://localhost:27017")
+TEST_DB_NAME = os.getenv("TEST_DB_NAME", "kirana_shop_test")
+
+os.environ["MONGO_URL"] = TEST_MONGO_URL
+os.environ["DB_NAME"] = TEST_DB_NAME
+
+CAPTURED_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+IGNORED_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "signature"}
+
+class CommandCapture(monitoring.CommandListener):
+    """Records read and write commands sent to the test database"""
+
+    def __init__(self):
+        self.commands = []
+        self._pending = {}
+
+    def clear(self):
+        self.commands = []
+        self._pending = {}
+
+    def started(self, event):
+        if event.database_name == TEST_DB_NAME and event.command_name in CAPTURED_COMMANDS:
+            command = {k: v for k, v in event.command.items() if k not in IGNORED_FIELDS}
+            entry = {"name": event.command_name, "command": command, "reply": None}
+            self._pending[event.request_id] = entry
+            self.commands.append(entry)
+
+    def succeeded(self, event):
+        entry = self._pending.pop(event.request_id, None)
+        if entry is not None:
+            entry["reply"] = event.reply
+
+    def failed(self, event):
+        self._pending.pop(event.request_id, None)
+
+# Registered before the app creates its client so every route command is seen
+command_capture = CommandCapture()
+monitoring.register(command_capture)
+
+@pytest.fixture(scope="session")
+def mongo_available():
+    """Skip when no MongoDB server is reachable at TEST_MONGO_URL"""
+    client = MongoClient(TEST_MONGO_URL, serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError as e:
+        pytest.skip(f"MongoDB not reachable at {TEST_MONGO_URL}: {e}")
+    finally:
+        client.close()
+
+@pytest.fixture(scope="session")
+def captured_commands():
+    """The listener recording every command the app sends to the test database"""
+    return command_capture
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    """In-memory database patched in as the app's db (needs mongomock-motor)"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import server
+    db = mongomock_motor.AsyncMongoMockClient()[TEST_DB_NAME]
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+@pytest.fixture
+def store(mock_db):
+    """A store user in mock_db and its Authorization header"""
+    from datetime import datetime
+    from utils.jwt_handler import create_access_token
+
+    result = asyncio.run(mock_db.users.insert_one({
+        "email": "store@example.com",
+        "password_hash": "x",
+        "store_name": "Test Store",
+        "owner_name": "Owner",
+        "phone": "9000000000",
+        "gst_number": None,
+        "store_code": "TS01",
+        "created_at": datetime.utcnow()
+    }))
+    user_id = str(result.inserted_id)
+    return {"user_id": user_id, "authorization": "Bearer " + create_access_token({"user_id": user_id})}
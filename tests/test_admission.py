@@ -0,0 +1,86 @@
+"""Admission control: request classes, per-store queues and shedding."""
+import asyncio
+
+import pytest
+
+from utils import admission
+from utils.admission import AdmissionController, classify_request
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("POST", "/api/bills/", "billing"),
+    ("POST", "/api/bills/quote", "billing"),
+    ("GET", "/api/bills/", "reporting"),
+    ("GET", "/api/dashboard/stats", "reporting"),
+    ("GET", "/api/reports/gst", "reporting"),
+    ("GET", "/api/products/", "catalog"),
+    ("POST", "/api/products/stock-adjustments", "catalog"),
+    ("POST", "/api/auth/login", None),
+    ("GET", "/api/health", None)
+])
+def test_classify_request(method, path, expected):
+    assert classify_request(method, path) == expected
+
+def test_requests_beyond_queue_are_rejected_with_429():
+    async def scenario():
+        controller = AdmissionController({"billing": (1, 1)})
+        assert await controller.acquire("store-1", "billing") is None
+
+        queued = asyncio.ensure_future(controller.acquire("store-1", "billing"))
+        await asyncio.sleep(0)
+        assert await controller.acquire("store-1", "billing") == 429
+
+        # Other stores have their own slots
+        assert await controller.acquire("store-2", "billing") is None
+
+        controller.release("store-1", "billing")
+        assert await queued is None
+        controller.release("store-1", "billing")
+        controller.release("store-2", "billing")
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.counters["billing"] == {"admitted": 3, "rejected_queue_full": 1, "rejected_timeout": 0}
+
+def test_queued_request_times_out_with_503(monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_QUEUE_TIMEOUT_SECONDS", 0.01)
+
+    async def scenario():
+        controller = AdmissionController({"reporting": (1, 4)})
+        assert await controller.acquire("store-1", "reporting") is None
+        assert await controller.acquire("store-1", "reporting") == 503
+        metrics = controller.metrics()["reporting"]
+        controller.release("store-1", "reporting")
+        return controller, metrics
+
+    controller, metrics = asyncio.run(scenario())
+    assert metrics["in_flight"] == 1 and metrics["queue_depth"] == 0
+    assert controller.counters["reporting"]["rejected_timeout"] == 1
+
+def test_idle_store_slots_are_dropped():
+    async def scenario():
+        controller = AdmissionController({"catalog": (2, 2)})
+        await controller.acquire("store-1", "catalog")
+        await controller.acquire("store-1", "catalog")
+        busy = controller.metrics()["catalog"]
+        controller.release("store-1", "catalog")
+        controller.release("store-1", "catalog")
+        return controller, busy
+
+    controller, busy = asyncio.run(scenario())
+    assert busy["in_flight"] == 2 and busy["active_stores"] == 1
+    assert controller.metrics()["catalog"]["active_stores"] == 0
+    assert controller._slots == {}
+
+def test_metrics_endpoint_requires_admin_token(monkeypatch):
+    from fastapi.testclient import TestClient
+    from utils import profiling
+    import server
+
+    client = TestClient(server.app)
+    assert client.get("/api/metrics/admission").status_code == 403
+
+    monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKEN", "secret")
+    assert client.get("/api/metrics/admission", headers={"X-Profile-Token": "wrong"}).status_code == 403
+    response = client.get("/api/metrics/admission", headers={"X-Profile-Token": "secret"})
+    assert response.status_code == 200
+    assert set(response.json()) == {"billing", "reporting", "catalog"}
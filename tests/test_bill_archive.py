@@ -0,0 +1,73 @@
+"""Bill history paging across the hot bills collection and the compressed archive."""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import Response
+
+from utils.bill_archive import archive_bills, archive_cutoff
+
+BILLS_PER_DAY = 2
+
+@pytest.fixture
+def history(mock_db, store):
+    """Two bills a day from six days before the archive cutoff to three days after, archived
+
+    Returns the cutoff and every bill newest first; 12 end up archived in six
+    day buckets and 8 stay in the hot tier.
+    """
+    cutoff = archive_cutoff()
+    bills = []
+    for day in range(-6, 4):
+        for n in range(BILLS_PER_DAY):
+            created_at = cutoff + timedelta(days=day, hours=9 + n)
+            bills.append({
+                "user_id": store["user_id"],
+                "bill_number": f"TS01-{created_at:%Y%m%d%H}",
+                "items": [],
+                "subtotal": 10.0,
+                "gst_amount": 0.5,
+                "total": 10.5,
+                "payment_method": "cash",
+                "customer_name": None,
+                "created_at": created_at
+            })
+    asyncio.run(mock_db.bills.insert_many(bills))
+    counts = asyncio.run(archive_bills(mock_db))
+    assert (counts["archived"], counts["buckets"]) == (12, 6)
+
+    bills.sort(key=lambda b: b["created_at"], reverse=True)
+    return cutoff, bills
+
+def page(store, skip, limit, start_date=None, end_date=None) -> list:
+    from routes.bills import get_bills
+    bills = asyncio.run(get_bills(
+        response=Response(), authorization=store["authorization"], skip=skip, limit=limit,
+        start_date=start_date, end_date=end_date, accept=None
+    ))
+    return [b.id for b in bills]
+
+def ids(bills) -> list:
+    return [str(b["_id"]) for b in bills]
+
+def test_page_straddling_both_tiers(store, history):
+    _, bills = history
+    assert page(store, skip=6, limit=5) == ids(bills[6:11])
+
+def test_deep_skip_lands_in_the_archive(store, history):
+    _, bills = history
+    # Skips the whole hot tier, two archive buckets and one bill of the third
+    assert page(store, skip=13, limit=4) == ids(bills[13:17])
+    assert page(store, skip=18, limit=10) == ids(bills[18:])
+    assert page(store, skip=20, limit=10) == []
+
+def test_date_range_crossing_the_cutoff(store, history):
+    cutoff, bills = history
+    start, end = cutoff - timedelta(days=2), cutoff + timedelta(days=2)
+    in_range = [b for b in bills if start <= b["created_at"] < end]
+    assert len(in_range) == 8
+
+    assert page(store, skip=0, limit=50, start_date=start, end_date=end) == ids(in_range)
+    assert page(store, skip=2, limit=4, start_date=start, end_date=end) == ids(in_range[2:6])
+    # Past the four hot bills in range, so the page comes from the archive alone
+    assert page(store, skip=5, limit=4, start_date=start, end_date=end) == ids(in_range[5:])
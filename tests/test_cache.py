@@ -0,0 +1,41 @@
+"""LocalCache generations: invalidations racing a pending read must win."""
+import pytest
+
+from utils.cache import LocalCache
+
+@pytest.fixture
+def cache():
+    cache = LocalCache("test", ttl_seconds=60)
+    cache.active = True
+    return cache
+
+def test_set_is_dropped_when_owner_invalidated_during_read(cache):
+    generation = cache.generation("store-1")
+    cache.invalidate_owner("store-1")  # change event handled while the read was pending
+    cache.set("stats", {"sales": 1}, owner="store-1", generation=generation)
+    assert cache.get("stats") is None
+
+def test_other_owners_do_not_affect_generation(cache):
+    generation = cache.generation("store-1")
+    cache.invalidate_owner("store-2")
+    cache.set("stats", {"sales": 1}, owner="store-1", generation=generation)
+    assert cache.get("stats") == {"sales": 1}
+
+def test_cache_wide_generation_changes_on_any_owner_invalidation(cache):
+    generation = cache.generation()
+    cache.invalidate_owner("product-9")
+    cache.set(("store-1", "890"), {"stock": 5}, owner="product-1", generation=generation)
+    assert cache.get(("store-1", "890")) is None
+
+def test_clear_drops_pending_sets(cache):
+    generation = cache.generation("store-1")
+    cache.clear()
+    cache.set("stats", {"sales": 1}, owner="store-1", generation=generation)
+    assert cache.get("stats") is None
+
+def test_invalidate_owner_removes_entries(cache):
+    cache.set("a", 1, owner="store-1", generation=cache.generation("store-1"))
+    cache.set("b", 2, owner="store-2")
+    cache.invalidate_owner("store-1")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
@@ -0,0 +1,45 @@
+"""Content negotiation: Accept q-values and Vary: Accept on negotiated routes."""
+import pytest
+
+from utils.responses import wants_msgpack
+
+@pytest.fixture
+def client(mock_db):
+    from fastapi.testclient import TestClient
+    import server
+    # No context manager: startup would verify the schema against a real server
+    return TestClient(server.app)
+
+@pytest.mark.parametrize("path", ["/api/products/", "/api/products/low-stock", "/api/bills/", "/api/dashboard/stats"])
+@pytest.mark.parametrize("accept", ["application/json", "application/msgpack"])
+def test_negotiated_responses_vary_on_accept(client, store, path, accept):
+    pytest.importorskip("msgpack")
+    response = client.get(path, headers={"Authorization": store["authorization"], "Accept": accept})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(accept)
+    assert "accept" in response.headers.get("vary", "").lower()
+
+@pytest.mark.parametrize("accept, expected", [
+    ("application/msgpack", True),
+    ("application/json, application/msgpack", True),
+    ("application/json, application/msgpack;q=0", False),
+    ("application/json;q=0.5, application/msgpack;q=0.9", True),
+    ("application/msgpack;q=0.5, application/json", False),
+    ("application/msgpack;q=0.5, */*;q=0.1", True),
+    ("*/*", False),
+    ("application/json", False),
+    (None, False)
+])
+def test_wants_msgpack_honours_q_values(accept, expected):
+    pytest.importorskip("msgpack")
+    assert wants_msgpack(accept) is expected
+
+def test_refused_msgpack_gets_json(client, store):
+    response = client.get(
+        "/api/products/",
+        headers={"Authorization": store["authorization"], "Accept": "application/json, application/msgpack;q=0"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
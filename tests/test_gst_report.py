@@ -0,0 +1,115 @@
+"""GST report: month splitting, materialized summaries and period bounds."""
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException, Response
+
+from utils.gst import gst_report
+
+NOW = datetime(2025, 5, 10, 12, 0)
+
+def add_bill(db, user_id: str, created_at: datetime, item_total: float, gst_rate: float = 5.0):
+    gst_amount = round(item_total * gst_rate / 100, 2)
+    asyncio.run(db.bills.insert_one({
+        "user_id": user_id,
+        "bill_number": f"TS01-{created_at:%Y%m%d%H%M}",
+        "items": [{
+            "product_id": "p1", "product_name": "Atta", "barcode": "890001", "quantity": 1,
+            "price": item_total, "gst_rate": gst_rate, "item_total": item_total, "gst_amount": gst_amount
+        }],
+        "subtotal": item_total,
+        "gst_amount": gst_amount,
+        "total": item_total + gst_amount,
+        "payment_method": "cash",
+        "customer_name": None,
+        "created_at": created_at
+    }))
+
+def summary_months(db, user_id: str) -> list:
+    async def months():
+        return [s["month"] async for s in db.gst_monthly_summaries.find({"user_id": user_id}).sort("month", 1)]
+    return asyncio.run(months())
+
+def test_partial_first_month_is_aggregated_and_whole_months_summarized(mock_db, store):
+    user_id = store["user_id"]
+    add_bill(mock_db, user_id, datetime(2025, 1, 10), 100.0)  # before the period
+    add_bill(mock_db, user_id, datetime(2025, 1, 20), 200.0)
+    add_bill(mock_db, user_id, datetime(2025, 2, 5), 300.0, gst_rate=18.0)
+    add_bill(mock_db, user_id, datetime(2025, 3, 3), 400.0)
+
+    report = asyncio.run(gst_report(mock_db, user_id, datetime(2025, 1, 15), datetime(2025, 4, 1), now=NOW))
+
+    assert report["bills"] == 3
+    assert report["summary_months"] == 2
+    assert report["total_taxable_value"] == 900.0
+    assert {s["gst_rate"]: s["taxable_value"] for s in report["slabs"]} == {5.0: 600.0, 18.0: 300.0}
+    # Only the whole closed months were materialized
+    assert summary_months(mock_db, user_id) == [datetime(2025, 2, 1), datetime(2025, 3, 1)]
+
+def test_closed_months_are_served_from_summaries(mock_db, store):
+    user_id = store["user_id"]
+    add_bill(mock_db, user_id, datetime(2025, 2, 5), 300.0)
+    asyncio.run(mock_db.gst_monthly_summaries.insert_one({
+        "user_id": user_id,
+        "month": datetime(2025, 2, 1),
+        "slabs": [{"gst_rate": 12.0, "taxable_value": 50.0, "tax_amount": 6.0, "quantity": 1, "lines": 1}],
+        "bills": 7,
+        "computed_at": NOW
+    }))
+
+    report = asyncio.run(gst_report(mock_db, user_id, datetime(2025, 2, 1), datetime(2025, 3, 1), now=NOW))
+
+    # The stored summary wins over the bills collection
+    assert report["bills"] == 7
+    assert report["slabs"] == [{"gst_rate": 12.0, "taxable_value": 50.0, "tax_amount": 6.0, "quantity": 1, "lines": 1}]
+
+def test_open_month_is_aggregated_live_and_never_stored(mock_db, store):
+    user_id = store["user_id"]
+    add_bill(mock_db, user_id, datetime(2025, 5, 2), 100.0)
+
+    first = asyncio.run(gst_report(mock_db, user_id, datetime(2025, 5, 1), NOW, now=NOW))
+    add_bill(mock_db, user_id, datetime(2025, 5, 9), 50.0)
+    second = asyncio.run(gst_report(mock_db, user_id, datetime(2025, 5, 1), NOW, now=NOW))
+
+    assert (first["bills"], first["summary_months"]) == (1, 0)
+    assert (second["bills"], second["total_taxable_value"]) == (2, 150.0)
+    assert summary_months(mock_db, user_id) == []
+
+def test_months_without_bills_are_not_persisted(mock_db, store):
+    user_id = store["user_id"]
+    add_bill(mock_db, user_id, datetime(2024, 11, 5), 100.0)
+
+    report = asyncio.run(gst_report(mock_db, user_id, datetime(2024, 6, 1), datetime(2025, 5, 1), now=NOW))
+
+    assert report["summary_months"] == 11
+    assert report["bills"] == 1
+    assert summary_months(mock_db, user_id) == [datetime(2024, 11, 1)]
+
+def get_report(store, start_date, end_date):
+    from routes.reports import get_gst_report
+    return asyncio.run(get_gst_report(
+        response=Response(), authorization=store["authorization"], accept=None,
+        start_date=start_date, end_date=end_date
+    ))
+
+def test_start_is_clamped_to_store_creation(mock_db, store):
+    from bson import ObjectId
+    created_at = datetime(2025, 1, 15)
+    asyncio.run(mock_db.users.update_one({"_id": ObjectId(store["user_id"])}, {"$set": {"created_at": created_at}}))
+
+    report = get_report(store, datetime(1900, 1, 1), datetime(2025, 3, 1))
+
+    assert report["start_date"] == created_at.isoformat()
+    assert asyncio.run(mock_db.gst_monthly_summaries.count_documents({})) == 0
+
+def test_period_longer_than_maximum_is_rejected(mock_db, store):
+    from bson import ObjectId
+    asyncio.run(mock_db.users.update_one(
+        {"_id": ObjectId(store["user_id"])}, {"$set": {"created_at": datetime(2015, 1, 1)}}
+    ))
+
+    with pytest.raises(HTTPException) as error:
+        get_report(store, datetime(2016, 1, 1), datetime(2024, 1, 1))
+
+    assert error.value.status_code == 400
@@ -0,0 +1,57 @@
+"""Sales log migration: legacy per-line documents into hourly buckets."""
+import asyncio
+from datetime import datetime, timedelta
+
+from scripts.migrate_sales_logs import migrate
+
+def add_lines(db, user_id: str, lines: list):
+    """Insert legacy lines given as (bill_id, date) pairs, one document each"""
+    asyncio.run(db.sales_logs.insert_many([
+        {
+            "user_id": user_id, "bill_id": bill_id, "product_id": f"p{i}", "product_name": "Atta",
+            "quantity": 1, "price": 10.0, "total": 10.0, "date": date
+        }
+        for i, (bill_id, date) in enumerate(lines)
+    ]))
+
+def buckets(db) -> list:
+    return asyncio.run(db.sales_log_buckets.find({}, {"_id": 0}).sort("hour", 1).to_list(None))
+
+def interleaved_bills() -> list:
+    # Two tills write 3-line bills at once, across an hour boundary
+    base = datetime(2025, 3, 1, 10, 59, 59)
+    return [
+        ("bill-a", base),
+        ("bill-b", base + timedelta(milliseconds=300)),
+        ("bill-a", base + timedelta(milliseconds=600)),
+        ("bill-b", base + timedelta(milliseconds=900)),
+        ("bill-a", base + timedelta(milliseconds=1200)),
+        ("bill-b", base + timedelta(milliseconds=1500))
+    ]
+
+def test_interleaved_bills_become_one_entry_each(mock_db):
+    add_lines(mock_db, "store-1", interleaved_bills())
+
+    counts = asyncio.run(migrate(mock_db, None, None))
+
+    assert counts == {"lines": 6, "buckets": 1}
+    [bucket] = buckets(mock_db)
+    # Keyed by each bill's earliest line, so both land in the 10:00 bucket
+    assert bucket["hour"] == datetime(2025, 3, 1, 10)
+    assert (bucket["bill_count"], bucket["line_count"]) == (2, 6)
+    assert [(e["bill_id"], e["date"], len(e["lines"])) for e in bucket["entries"]] == [
+        ("bill-a", datetime(2025, 3, 1, 10, 59, 59), 3),
+        ("bill-b", datetime(2025, 3, 1, 10, 59, 59, 300000), 3)
+    ]
+
+def test_cutoff_never_splits_a_bill(mock_db):
+    add_lines(mock_db, "store-1", interleaved_bills())
+    cutoff = datetime(2025, 3, 1, 10, 59, 59, 100000)
+
+    first = asyncio.run(migrate(mock_db, None, cutoff))
+    second = asyncio.run(migrate(mock_db, cutoff, None))
+
+    # Each bill goes whole to the pass holding its first line, even with lines on both sides
+    assert (first["lines"], second["lines"]) == (3, 3)
+    entries = [e for b in buckets(mock_db) for e in b["entries"]]
+    assert sorted((e["bill_id"], len(e["lines"])) for e in entries) == [("bill-a", 3), ("bill-b", 3)]
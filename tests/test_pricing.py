@@ -0,0 +1,95 @@
+"""Server-side pricing: Decimal half-up rounding and bill repricing."""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from utils.pricing import cart_totals, price_line
+
+def product(price, gst_rate, **extra):
+    return {"_id": "p1", "name": "Toor Dal 1kg", "barcode": "890001", "price": price, "gst_rate": gst_rate, **extra}
+
+def test_line_total_has_no_float_drift():
+    line = price_line(product(0.1, 0.0), 3)
+    assert line["item_total"] == 0.3
+    assert line["gst_amount"] == 0.0
+
+@pytest.mark.parametrize("price, gst_rate, item_total, gst_amount", [
+    (53.5, 5.0, 53.5, 2.68),     # 2.675 rounds half up (float rounding gives 2.67)
+    (2.75, 18.0, 2.75, 0.5),     # 0.495 rounds half up (float rounding gives 0.49)
+    (99.99, 28.0, 99.99, 28.0),  # 27.9972
+    (40.0, 12.0, 40.0, 4.8)
+])
+def test_gst_rounds_half_up_to_paise(price, gst_rate, item_total, gst_amount):
+    line = price_line(product(price, gst_rate), 1)
+    assert (line["item_total"], line["gst_amount"]) == (item_total, gst_amount)
+
+def test_cart_totals_sum_in_decimal():
+    lines = [price_line(product(0.1, 0.0), 1), price_line(product(0.2, 0.0), 1), price_line(product(53.5, 5.0), 1)]
+    assert cart_totals(lines) == (53.8, 2.68, 56.48)
+
+def test_reprice_overrides_client_amounts(mock_db, store):
+    from models.bill import BillCreate
+    from routes.bills import create_bill
+
+    now = datetime.utcnow()
+    product_id = asyncio.run(mock_db.products.insert_one({
+        "user_id": store["user_id"], "name": "Toor Dal 1kg", "barcode": "890001", "price": 53.5, "stock": 10,
+        "min_stock_alert": 5, "category": None, "image_base64": None, "gst_rate": 5.0,
+        "created_at": now, "updated_at": now
+    })).inserted_id
+
+    # The client claims a different price and totals; the stored product wins
+    bill = BillCreate(items=[{
+        "product_id": str(product_id), "product_name": "Toor Dal 1kg", "barcode": "890001",
+        "quantity": 2, "price": 1.0, "gst_rate": 0.0, "item_total": 2.0, "gst_amount": 0.0
+    }], reprice=True)
+    response = asyncio.run(create_bill(bill, authorization=store["authorization"]))
+
+    assert (response.subtotal, response.gst_amount, response.total) == (107.0, 5.35, 112.35)
+    item = response.items[0]
+    assert (item.price, item.gst_rate, item.item_total, item.gst_amount) == (53.5, 5.0, 107.0, 5.35)
+
+    stored = asyncio.run(mock_db.bills.find_one({}))
+    assert stored["total"] == 112.35
+    assert stored["items"][0]["item_total"] == 107.0
+
+def test_without_reprice_client_amounts_are_kept(mock_db, store):
+    from models.bill import BillCreate
+    from routes.bills import create_bill
+
+    now = datetime.utcnow()
+    product_id = asyncio.run(mock_db.products.insert_one({
+        "user_id": store["user_id"], "name": "Salt", "barcode": "890002", "price": 20.0, "stock": 10,
+        "min_stock_alert": 5, "category": None, "image_base64": None, "gst_rate": 0.0,
+        "created_at": now, "updated_at": now
+    })).inserted_id
+
+    bill = BillCreate(items=[{
+        "product_id": str(product_id), "product_name": "Salt", "barcode": "890002",
+        "quantity": 1, "price": 18.0, "gst_rate": 0.0, "item_total": 18.0, "gst_amount": 0.0
+    }])
+    response = asyncio.run(create_bill(bill, authorization=store["authorization"]))
+
+    assert response.total == 18.0
+
+def test_uppercase_product_id_is_found(mock_db, store):
+    from models.bill import BillCreate
+    from routes.bills import create_bill
+
+    now = datetime.utcnow()
+    product_id = asyncio.run(mock_db.products.insert_one({
+        "user_id": store["user_id"], "name": "Toor Dal 1kg", "barcode": "890001", "price": 53.5, "stock": 10,
+        "min_stock_alert": 5, "category": None, "image_base64": None, "gst_rate": 5.0,
+        "created_at": now, "updated_at": now
+    })).inserted_id
+
+    bill = BillCreate(items=[{
+        "product_id": str(product_id).upper(), "product_name": "Toor Dal 1kg", "barcode": "890001",
+        "quantity": 1, "price": 53.5, "gst_rate": 5.0, "item_total": 53.5, "gst_amount": 2.68
+    }], reprice=True)
+    response = asyncio.run(create_bill(bill, authorization=store["authorization"]))
+
+    assert response.items[0].product_id == str(product_id)
+    assert response.total == 56.18
+    assert asyncio.run(mock_db.products.find_one({"_id": product_id}))["stock"] == 9
@@ -0,0 +1,282 @@
+"""Query-plan regression checks for every route's MongoDB queries.
+
+Seeds a throwaway database on a local MongoDB (TEST_MONGO_URL), calls each
+route handler, captures the commands it sends and runs them through
+explain("executionStats"). A query fails when its winning plan contains a
+COLLSCAN or an in-memory SORT, or when it examines far more index keys or
+documents than it returns. Skipped when no MongoDB server is reachable.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import Response
+
+# Examined keys/docs allowed per returned doc, ignoring queries under MIN_EXAMINED
+MAX_EXAMINED_RATIO = float(os.getenv("QUERY_PLAN_MAX_EXAMINED_RATIO", "2"))
+MIN_EXAMINED = int(os.getenv("QUERY_PLAN_MIN_EXAMINED", "50"))
+
+STORES = 3
+PRODUCTS_PER_STORE = 400
+BILLS_PER_STORE = 600
+
+PLAN_CHILD_KEYS = ("inputStage", "inputStages", "queryPlan", "thenStage", "elseStage", "outerStage", "innerStage")
+
+# ---------------------------------------------------------------------------
+# Seeding
+# ---------------------------------------------------------------------------
+
+async def seed(db) -> list:
+    """Load equal-sized synthetic stores; returns their documents plus a token each"""
+    from scripts.synthetic_data import generate_stores, load_store
+    from utils.jwt_handler import create_access_token
+
+    stores = []
+    for store in generate_stores(STORES, PRODUCTS_PER_STORE, BILLS_PER_STORE, seed=1234, spread=0):
+        await load_store(db, store)
+        store["authorization"] = "Bearer " + create_access_token({"user_id": str(store["user"]["_id"])})
+        stores.append(store)
+    return stores
+
+# ---------------------------------------------------------------------------
+# Route cases: each calls one handler with every parameter given explicitly
+# ---------------------------------------------------------------------------
+
+async def case_auth_me(store):
+    from routes import auth
+    await auth.get_current_user_info(authorization=store["authorization"])
+
+async def case_products_list(store):
+    from routes import products
+    await products.get_products(
+        authorization=store["authorization"], response=Response(), accept=None, skip=0, limit=100, search=None
+    )
+
+async def case_products_search(store):
+    from routes import products
+    await products.get_products(
+        authorization=store["authorization"], response=Response(), accept=None, skip=0, limit=100, search="dal"
+    )
+
+async def case_products_by_barcode(store):
+    from routes import products
+    await products.get_product_by_barcode(
+        store["products"][7]["barcode"], authorization=store["authorization"], response=Response(), accept=None
+    )
+
+async def case_products_low_stock(store):
+    from routes import products
+    await products.get_low_stock_products(authorization=store["authorization"], response=Response(), accept=None)
+
+async def case_products_get(store):
+    from routes import products
+    await products.get_product(
+        str(store["products"][3]["_id"]), authorization=store["authorization"], response=Response(), accept=None
+    )
+
+async def case_products_update(store):
+    from routes import products
+    from models.product import ProductUpdate
+    await products.update_product(
+        str(store["products"][5]["_id"]), ProductUpdate(price=99.5), authorization=store["authorization"]
+    )
+
+async def case_products_stock_adjustments(store):
+    from routes import products
+    from models.product import StockAdjustmentRequest
+    rows = [{"barcode": p["barcode"], "delta": 5} for p in store["products"][20:60]]
+    rows += [{"product_id": str(p["_id"]), "absolute": 100} for p in store["products"][60:80]]
+    await products.adjust_stock(
+        StockAdjustmentRequest(rows=rows, reason="shipment"), authorization=store["authorization"]
+    )
+
+async def case_bills_quote(store):
+    from routes import bills
+    from models.bill import CartQuoteRequest
+    items = [{"barcode": p["barcode"], "quantity": 1} for p in store["products"][100:110]]
+    await bills.quote_cart(CartQuoteRequest(items=items), authorization=store["authorization"])
+
+async def case_bills_create(store):
+    from routes import bills
+    from models.bill import BillCreate
+    items = [
+        {
+            "product_id": str(p["_id"]), "product_name": p["name"], "barcode": p["barcode"],
+            "quantity": 1, "price": p["price"], "gst_rate": p["gst_rate"], "item_total": 0, "gst_amount": 0
+        }
+        for p in [p for p in store["products"] if p["stock"] > 0][:4]
+    ]
+    await bills.create_bill(BillCreate(items=items, reprice=True), authorization=store["authorization"])
+
+async def case_bills_list(store):
+    from routes import bills
+    await bills.get_bills(
+        authorization=store["authorization"], skip=0, limit=50, start_date=None, end_date=None, response=Response(), accept=None
+    )
+
+async def case_bills_list_range(store):
+    from routes import bills
+    end = store["bills"][-1]["created_at"] - timedelta(days=10)
+    await bills.get_bills(
+        authorization=store["authorization"], skip=0, limit=50,
+        start_date=end - timedelta(days=7), end_date=end, response=Response(), accept=None
+    )
+
+async def case_bills_get(store):
+    from routes import bills
+    await bills.get_bill(
+        str(store["bills"][11]["_id"]), authorization=store["authorization"], response=Response(), accept=None
+    )
+
+async def case_dashboard_stats(store):
+    from routes import dashboard
+    await dashboard.get_dashboard_stats(authorization=store["authorization"], response=Response(), accept=None)
+
+async def case_dashboard_recent_bills(store):
+    from routes import dashboard
+    await dashboard.get_recent_bills(authorization=store["authorization"], response=Response(), accept=None, limit=5)
+
+async def case_reports_gst(store):
+    from routes import reports
+    now = datetime.utcnow()
+    await reports.get_gst_report(
+        authorization=store["authorization"], response=Response(), accept=None,
+        start_date=now - timedelta(days=100), end_date=now
+    )
+
+CASES = {
+    name[len("case_"):]: func
+    for name, func in list(globals().items())
+    if name.startswith("case_")
+}
+
+# Queries that cannot use an index today; kept visible as expected failures
+KNOWN_SCANS = {
+    "products_search": "unanchored case-insensitive $regex on name scans every product key of the store",
+    "products_low_stock": "$expr stock <= min_stock_alert is evaluated per document",
+    "dashboard_stats": "low-stock count uses the same $expr filter"
+}
+
+# ---------------------------------------------------------------------------
+# Plan analysis
+# ---------------------------------------------------------------------------
+
+def plan_stages(node) -> list:
+    """Flatten the stage names of an explain plan tree"""
+    if isinstance(node, list):
+        return [stage for child in node for stage in plan_stages(child)]
+    if not isinstance(node, dict):
+        return []
+    stages = [node["stage"]] if "stage" in node else []
+    for key in PLAN_CHILD_KEYS:
+        if key in node:
+            stages += plan_stages(node[key])
+    return stages
+
+def as_find(entry: dict):
+    """Express a captured read as an equivalent find, or None when it has no query layer"""
+    command = entry["command"]
+    name = entry["name"]
+    if name == "find":
+        return dict(command)
+    if name in ("count", "distinct"):
+        return {"find": command[name], "filter": command.get("query", {})}
+    if name == "aggregate":
+        pipeline = command["pipeline"]
+        if not pipeline or "$match" not in pipeline[0]:
+            return None
+        find = {"find": command["aggregate"], "filter": pipeline[0]["$match"]}
+        for stage in pipeline[1:]:
+            if "$sort" in stage and "sort" not in find:
+                find["sort"] = stage["$sort"]
+            elif "$skip" in stage:
+                find["skip"] = stage["$skip"]
+            elif "$limit" in stage:
+                find["limit"] = stage["$limit"]
+            else:
+                break
+        return find
+    return None
+
+def explainable_commands(entry: dict) -> list:
+    """Commands to explain for one captured command (writes are explained per statement)"""
+    if entry["name"] in ("update", "delete"):
+        key = "updates" if entry["name"] == "update" else "deletes"
+        base = {k: v for k, v in entry["command"].items() if k not in (key, "ordered")}
+        return [{**base, key: [statement]} for statement in entry["command"][key][:5]]
+    if entry["name"] == "findAndModify":
+        return [dict(entry["command"])]
+    find = as_find(entry)
+    if find is None:
+        return []
+    for field in ("batchSize", "singleBatch", "cursor"):
+        find.pop(field, None)
+    return [find]
+
+def violations(explain: dict, description: str) -> list:
+    problems = []
+    planner = explain.get("queryPlanner", {})
+    stages = plan_stages(planner.get("winningPlan", {}))
+    if "COLLSCAN" in stages:
+        problems.append(f"COLLSCAN: {description}")
+    if "SORT" in stages:
+        problems.append(f"in-memory SORT: {description}")
+
+    stats = explain.get("executionStats", {})
+    examined = max(stats.get("totalKeysExamined", 0), stats.get("totalDocsExamined", 0))
+    returned = max(stats.get("nReturned", 0), 1)
+    if examined > MIN_EXAMINED and examined > MAX_EXAMINED_RATIO * returned:
+        problems.append(f"examined {examined} for {returned} returned: {description}")
+    return problems
+
+async def explain_case(db, capture, case, store) -> list:
+    capture.clear()
+    await case(store)
+    captured = list(capture.commands)
+
+    problems = []
+    for entry in captured:
+        for command in explainable_commands(entry):
+            explain = await db.command({"explain": command, "verbosity": "executionStats"})
+            description = f"{entry['name']} {command}"
+            problems += violations(explain, description[:400])
+    return problems
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def plan_report(mongo_available, captured_commands):
+    """Seed the database once, run every case, and collect its plan problems"""
+    import server
+    from utils.schema import run_migrations
+
+    async def run():
+        db = server.db
+        await server.client.drop_database(db.name)
+        try:
+            await run_migrations(db)
+            stores = await seed(db)
+            # Use the middle store so neighbouring tenants' data surrounds it in every index
+            store = stores[len(stores) // 2]
+            report = {}
+            for name, case in CASES.items():
+                try:
+                    report[name] = await explain_case(db, captured_commands, case, store)
+                except Exception as e:
+                    report[name] = [f"case raised {type(e).__name__}: {e}"]
+            return report
+        finally:
+            await server.client.drop_database(db.name)
+
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("case_name", [
+    pytest.param(name, marks=pytest.mark.xfail(reason=KNOWN_SCANS[name])) if name in KNOWN_SCANS else name
+    for name in CASES
+])
+def test_route_queries_use_indexes(plan_report, case_name):
+    problems = plan_report[case_name]
+    assert not problems, "\n".join(problems)
@@ -0,0 +1,118 @@
+"""Bulk stock adjustments: repeated rows, guarded removals and the audit log."""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+def add_product(db, user_id: str, barcode: str, stock: int) -> str:
+    now = datetime.utcnow()
+    result = asyncio.run(db.products.insert_one({
+        "user_id": user_id,
+        "name": f"Product {barcode}",
+        "barcode": barcode,
+        "price": 10.0,
+        "stock": stock,
+        "min_stock_alert": 5,
+        "category": None,
+        "image_base64": None,
+        "gst_rate": 5.0,
+        "created_at": now,
+        "updated_at": now
+    }))
+    return str(result.inserted_id)
+
+def stock_of(db, barcode: str) -> int:
+    return asyncio.run(db.products.find_one({"barcode": barcode}))["stock"]
+
+def adjust(store, rows):
+    from models.product import StockAdjustmentRequest
+    from routes.products import adjust_stock
+    return asyncio.run(adjust_stock(
+        StockAdjustmentRequest(rows=rows, reason="stock_take"), authorization=store["authorization"]
+    ))
+
+def test_repeated_rows_stack_in_request_order(mock_db, store):
+    add_product(mock_db, store["user_id"], "A", 10)
+    add_product(mock_db, store["user_id"], "B", 10)
+
+    response = adjust(store, [
+        {"barcode": "A", "absolute": 50},
+        {"barcode": "A", "delta": 5},
+        {"barcode": "B", "delta": -2},
+        {"barcode": "B", "delta": -3}
+    ])
+
+    assert [r.status for r in response.results] == ["applied"] * 4
+    assert stock_of(mock_db, "A") == 55
+    assert stock_of(mock_db, "B") == 5
+    assert [r.stock for r in response.results] == [55, 55, 5, 5]
+
+    log = asyncio.run(mock_db.stock_adjustments.find_one({}))
+    assert [(row["before"], row["after"]) for row in log["rows"]] == [(10, 50), (50, 55), (10, 8), (8, 5)]
+
+def test_uppercase_product_id_matches_product(mock_db, store):
+    product_id = add_product(mock_db, store["user_id"], "A", 10)
+
+    response = adjust(store, [{"product_id": product_id.upper(), "delta": 3}])
+
+    assert response.results[0].status == "applied"
+    assert response.results[0].product_id == product_id
+    assert stock_of(mock_db, "A") == 13
+
+def test_lost_guarded_removal_only_conflicts_its_product(mock_db, store, monkeypatch):
+    import mongomock.collection
+
+    add_product(mock_db, store["user_id"], "A", 10)
+    add_product(mock_db, store["user_id"], "B", 5)
+
+    # A sale of B lands between the adjustment's read and its bulk write
+    original = mongomock.collection.Collection.bulk_write
+
+    def bulk_write_after_sale(self, requests, *args, **kwargs):
+        self.update_one({"barcode": "B"}, {"$inc": {"stock": -3}})
+        return original(self, requests, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", bulk_write_after_sale)
+
+    response = adjust(store, [
+        {"barcode": "A", "delta": -2},
+        {"barcode": "A", "delta": -3},
+        {"barcode": "B", "delta": -4}
+    ])
+
+    assert [r.status for r in response.results] == ["applied", "applied", "conflict"]
+    assert response.applied == 2 and response.failed == 1
+    assert stock_of(mock_db, "A") == 5
+    assert stock_of(mock_db, "B") == 2
+    assert response.results[2].stock == 2
+
+    log = asyncio.run(mock_db.stock_adjustments.find_one({}))
+    assert log["rows"][2]["conflict"] is True
+    assert "before" not in log["rows"][2] and "after" not in log["rows"][2]
+    assert [row["after"] for row in log["rows"][:2]] == [8, 5]
+
+def test_rows_that_would_go_negative_are_rejected(mock_db, store):
+    add_product(mock_db, store["user_id"], "A", 3)
+
+    response = adjust(store, [
+        {"barcode": "A", "delta": -2},
+        {"barcode": "A", "delta": -2},
+        {"barcode": "missing", "delta": 1}
+    ])
+
+    assert [r.status for r in response.results] == ["applied", "insufficient_stock", "not_found"]
+    assert stock_of(mock_db, "A") == 1
+
+@pytest.mark.parametrize("row", [
+    {"barcode": "A"},
+    {"barcode": "A", "delta": 1, "absolute": 2},
+    {"product_id": "not-an-id", "delta": 1}
+])
+def test_invalid_rows_are_reported_without_writing(mock_db, store, row):
+    add_product(mock_db, store["user_id"], "A", 3)
+
+    response = adjust(store, [row])
+
+    assert response.results[0].status == "invalid"
+    assert stock_of(mock_db, "A") == 3
+    assert asyncio.run(mock_db.stock_adjustments.count_documents({})) == 0